@@ -37,6 +37,8 @@ const messageContextStorage = new AsyncLocalStorage<RuntimeMessageContext | null
 export class RuntimeLogWriter {
   private readonly nowProvider: () => Date;
   private readonly stdout: NodeJS.WriteStream;
+  /** Log directories already created — avoids a mkdir syscall on every line. */
+  private readonly createdLogDirs = new Set<string>();
 
   constructor(private readonly options: RuntimeLogWriterOptions) {
     this.nowProvider = options.nowProvider ?? (() => new Date());
@@ -58,7 +60,11 @@ export class RuntimeLogWriter {
 
     const context = messageContextStorage.getStore();
     const path = context?.logPath ?? this.getSystemLogPath(now);
-    mkdirSync(dirname(path), { recursive: true });
+    const dir = dirname(path);
+    if (!this.createdLogDirs.has(dir)) {
+      mkdirSync(dir, { recursive: true });
+      this.createdLogDirs.add(dir);
+    }
     appendFileSync(path, line, { encoding: "utf-8" });
   }
 
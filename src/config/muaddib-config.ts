@@ -296,7 +296,7 @@ type DeepPartial<T> = T extends object
 
 /**
  * Deep-merges two room config objects with room-specific semantics:
- * - `ignoreUsers` arrays are concatenated (not replaced) at any nesting depth
+ * - `ignoreUsers` and `userAllowlist` arrays are concatenated (not replaced) at any nesting depth
  * - `promptVars` string values are concatenated (not replaced) at any nesting depth
  *
  * Built on the generic `deepMerge` with per-key hooks for the special cases.
@@ -312,30 +312,48 @@ export function mergeRoomConfigs(
   ) as RoomConfig;
 }
 
-function roomMergeHook(key: string, baseVal: unknown, overrideVal: unknown): unknown | undefined {
-  if ((key === "ignoreUsers" || key === "userAllowlist") && Array.isArray(baseVal) && Array.isArray(overrideVal)) {
+type RoomKeyMerger = (baseVal: unknown, overrideVal: unknown) => unknown | undefined;
+
+function concatArrays(baseVal: unknown, overrideVal: unknown): unknown | undefined {
+  if (Array.isArray(baseVal) && Array.isArray(overrideVal)) {
     return [...baseVal, ...overrideVal];
   }
+  return undefined;
+}
 
-  if (key === "promptVars" && isRecord(baseVal) && isRecord(overrideVal)) {
-    const merged: Record<string, unknown> = { ...baseVal };
-    for (const [varKey, varValue] of Object.entries(overrideVal)) {
-      if (typeof merged[varKey] === "string" && typeof varValue === "string") {
-        merged[varKey] = `${merged[varKey]}${varValue}`;
-      } else {
-        merged[varKey] = varValue;
-      }
+function concatPromptVars(baseVal: unknown, overrideVal: unknown): unknown | undefined {
+  if (!isRecord(baseVal) || !isRecord(overrideVal)) {
+    return undefined;
+  }
+  const merged: Record<string, unknown> = { ...baseVal };
+  for (const varKey of Object.keys(overrideVal)) {
+    const varValue = overrideVal[varKey];
+    if (typeof merged[varKey] === "string" && typeof varValue === "string") {
+      merged[varKey] = `${merged[varKey]}${varValue}`;
+    } else {
+      merged[varKey] = varValue;
     }
-    return merged;
   }
+  return merged;
+}
 
-  return undefined;
+/** Keys with non-default merge semantics; every other key takes the generic path with one lookup. */
+const ROOM_KEY_MERGERS = new Map<string, RoomKeyMerger>([
+  ["ignoreUsers", concatArrays],
+  ["userAllowlist", concatArrays],
+  ["promptVars", concatPromptVars],
+]);
+
+function roomMergeHook(key: string, baseVal: unknown, overrideVal: unknown): unknown | undefined {
+  return ROOM_KEY_MERGERS.get(key)?.(baseVal, overrideVal);
 }
 
 // ── MuaddibConfig ──────────────────────────────────────────────────────
 
 export class MuaddibConfig {
   private readonly data: MuaddibSettings;
+  /** Merged room configs; settings are never reloaded, so entries never go stale. */
+  private readonly roomConfigCache = new Map<string, RoomConfig>();
 
   private constructor(data: MuaddibSettings) {
     this.data = data;
@@ -394,10 +412,20 @@ export class MuaddibConfig {
     return this.data.costPolicy;
   }
 
+  /**
+   * Returns the common + room merged config. The result is memoized and
+   * shared between callers, so treat it as read-only.
+   */
   getRoomConfig(roomName: string): RoomConfig {
+    const cached = this.roomConfigCache.get(roomName);
+    if (cached) {
+      return cached;
+    }
     const rooms = this.data.rooms ?? {};
     const common = rooms.common ?? {};
     const room = rooms[roomName] ?? {};
-    return mergeRoomConfigs(common, room);
+    const merged = mergeRoomConfigs(common, room);
+    this.roomConfigCache.set(roomName, merged);
+    return merged;
   }
 }
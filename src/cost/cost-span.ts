@@ -171,17 +171,18 @@ export async function persistCostSpan(
   const userArc = typeof span.attributes.userArc === "string" ? span.attributes.userArc : undefined;
   const byok = span.attributes.byok === true;
 
-  for (const entry of span.allEntries()) {
-    await options.history.logLlmCost(arc, {
-      ...(options.run ? { run: options.run } : {}),
-      source: span.name,
-      call: entry.callType,
-      model: entry.model,
-      inTok: entry.usage.input + entry.usage.cacheRead + entry.usage.cacheWrite,
-      outTok: entry.usage.output,
-      cost: entry.usage.cost.total,
-    });
-
+  const entries = span.allEntries();
+  await options.history.logLlmCosts(arc, entries.map((entry) => ({
+    ...(options.run ? { run: options.run } : {}),
+    source: span.name,
+    call: entry.callType,
+    model: entry.model,
+    inTok: entry.usage.input + entry.usage.cacheRead + entry.usage.cacheWrite,
+    outTok: entry.usage.output,
+    cost: entry.usage.cost.total,
+  })));
+
+  for (const entry of entries) {
     if (
       userArc &&
       options.userCostLedger &&
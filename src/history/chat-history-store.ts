@@ -62,6 +62,17 @@ export interface JsonlLine {
   edit?: boolean;
 }
 
+/** A non-chat LLM cost row as accepted by `logLlmCost` / `logLlmCosts`. */
+export interface LlmCostRow {
+  run?: string;
+  source?: string;
+  call: string;
+  model: string;
+  inTok?: number;
+  outTok?: number;
+  cost?: number;
+}
+
 export interface HistoryMessageRow {
   nick: string;
   message: string;
@@ -145,30 +156,29 @@ export class ChatHistoryStore {
   /**
    * Log a non-chat LLM cost (chronicler, oracle, classifier, etc.).
    */
-  async logLlmCost(
-    arc: string,
-    opts: {
-      run?: string;
-      source?: string;
-      call: string;
-      model: string;
-      inTok?: number;
-      outTok?: number;
-      cost?: number;
-    },
-  ): Promise<void> {
-    const line: JsonlLine = {
-      ts: new Date().toISOString(),
-    };
-    if (opts.run) line.run = opts.run;
-    if (opts.source) line.source = opts.source;
-    line.call = opts.call;
-    line.model = opts.model;
-    if (opts.inTok !== undefined) line.inTok = opts.inTok;
-    if (opts.outTok !== undefined) line.outTok = opts.outTok;
-    if (opts.cost !== undefined) line.cost = opts.cost;
+  async logLlmCost(arc: string, opts: LlmCostRow): Promise<void> {
+    await this.logLlmCosts(arc, [opts]);
+  }
 
-    this.appendLine(arc, line);
+  /**
+   * Log several LLM cost rows for one arc with a single append.
+   */
+  async logLlmCosts(arc: string, rows: LlmCostRow[]): Promise<void> {
+    if (rows.length === 0) {
+      return;
+    }
+    const ts = new Date().toISOString();
+    this.appendLines(arc, ts.slice(0, 10), rows.map((opts) => {
+      const line: JsonlLine = { ts };
+      if (opts.run) line.run = opts.run;
+      if (opts.source) line.source = opts.source;
+      line.call = opts.call;
+      line.model = opts.model;
+      if (opts.inTok !== undefined) line.inTok = opts.inTok;
+      if (opts.outTok !== undefined) line.outTok = opts.outTok;
+      if (opts.cost !== undefined) line.cost = opts.cost;
+      return line;
+    }));
   }
 
   async getContextForMessage(
@@ -332,14 +342,18 @@ export class ChatHistoryStore {
   // ── Internal I/O ──
 
   private appendLine(arc: string, line: JsonlLine): void {
-    const date = line.ts.slice(0, 10);
-    const filePath = this.jsonlPath(arc, date);
+    this.appendLines(arc, line.ts.slice(0, 10), [line]);
+  }
+
+  /** Append lines to one daily file with a single write. */
+  private appendLines(arc: string, date: string, lines: JsonlLine[]): void {
     const dirKey = join(this.arcsBasePath, arc, "chat_history");
     if (!this.createdHistoryDirs.has(dirKey)) {
       mkdirSync(dirKey, { recursive: true });
       this.createdHistoryDirs.add(dirKey);
     }
-    appendFileSync(filePath, JSON.stringify(line) + "\n", "utf-8");
+    const chunk = lines.map((line) => JSON.stringify(line) + "\n").join("");
+    appendFileSync(this.jsonlPath(arc, date), chunk, "utf-8");
   }
 
   private async readJsonlFile(path: string): Promise<JsonlLine[]> {
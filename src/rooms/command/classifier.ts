@@ -7,6 +7,9 @@ import { responseText as extractResponseText } from "../../agent/message.js";
 import type { CommandConfig } from "./resolver.js";
 import { LLM_CALL_TYPE } from "../../cost/llm-call-type.js";
 
+const META_ANNOTATION_RE = /\n?<meta>.*?<\/meta>/gs;
+const IRC_NICK_RE = /<[^>]+>\s*(.*)$/;
+
 export interface ModeClassifierOptions {
   modelAdapter: PiAiModelAdapter;
   logger?: Logger;
@@ -19,11 +22,28 @@ export function createModeClassifier(
   const adapter = options.modelAdapter;
   const logger = options.logger ?? NOOP_LOGGER;
 
-  return async (context: Message[]): Promise<string> => {
-    const fallbackLabel =
-      commandConfig.modeClassifier.fallbackLabel ??
-      Object.keys(commandConfig.modeClassifier.labels)[0];
+  // Label lookups are fixed for the classifier's lifetime — derive them once.
+  const labels = Object.keys(commandConfig.modeClassifier.labels);
+  const fallbackLabel = commandConfig.modeClassifier.fallbackLabel ?? labels[0];
+  const labelByUpper = new Map<string, string>();
+  for (const label of labels) {
+    if (!labelByUpper.has(label.toUpperCase())) {
+      labelByUpper.set(label.toUpperCase(), label);
+    }
+  }
+  // One whole-word alternation pass instead of a regex scan per label;
+  // longest first so a label never shadows a longer one sharing its prefix.
+  const labelWordRe = labels.length > 0
+    ? new RegExp(
+      `\\b(?:${[...labelByUpper.keys()]
+        .sort((a, b) => b.length - a.length)
+        .map((label) => label.replace(/[.*+?^${}()|[\]\\]/g, "\\$&"))
+        .join("|")})\\b`,
+      "g",
+    )
+    : null;
 
+  return async (context: Message[]): Promise<string> => {
     if (context.length === 0) {
       logger.error("Error classifying mode", "context is empty");
       return fallbackLabel;
@@ -31,7 +51,6 @@ export function createModeClassifier(
 
     try {
       const currentMessage = extractCurrentMessage(context[context.length - 1]);
-      const labels = Object.keys(commandConfig.modeClassifier.labels);
       const classifierPrompt =
         commandConfig.modeClassifier.prompt ??
         `Analyze the latest message and pick exactly one label: ${labels.join(", ")}. Message: {message}`;
@@ -55,18 +74,21 @@ export function createModeClassifier(
       const normalizedText = classifierResponse.toUpperCase();
 
       // Try exact match first (the prompt asks for exactly one token).
-      for (const label of labels) {
-        if (normalizedText === label.toUpperCase()) {
-          return label;
-        }
+      const exactLabel = labelByUpper.get(normalizedText);
+      if (exactLabel !== undefined) {
+        return exactLabel;
       }
 
-      // Fall back to whole-word boundary matching.
+      // Fall back to whole-word boundary matching; ties go to the earlier label.
+      const counts = new Map<string, number>();
+      for (const match of labelWordRe ? normalizedText.matchAll(labelWordRe) : []) {
+        const label = labelByUpper.get(match[0])!;
+        counts.set(label, (counts.get(label) ?? 0) + 1);
+      }
       let bestLabel = fallbackLabel;
       let bestCount = 0;
       for (const label of labels) {
-        const pattern = new RegExp(`\\b${label.toUpperCase()}\\b`, "g");
-        const count = (normalizedText.match(pattern) ?? []).length;
+        const count = counts.get(label) ?? 0;
         if (count > bestCount) {
           bestLabel = label;
           bestCount = count;
@@ -89,7 +111,7 @@ export function createModeClassifier(
 function extractCurrentMessage(message: Message): string {
   const text = messageText(message);
   // Strip <meta>...</meta> annotations before extracting the IRC nick payload.
-  const cleaned = text.replace(/\n?<meta>.*?<\/meta>/gs, "");
-  const match = cleaned.match(/<[^>]+>\s*(.*)$/);
+  const cleaned = text.replace(META_ANNOTATION_RE, "");
+  const match = cleaned.match(IRC_NICK_RE);
   return match ? match[1].trim() : cleaned;
 }
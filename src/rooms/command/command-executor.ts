@@ -55,6 +55,7 @@ import { RateLimiter } from "./rate-limiter.js";
 import {
   CommandResolver,
   type CommandConfig,
+  type ParsedPrefix,
 } from "./resolver.js";
 import { generateToolSummaryFromSession } from "./tool-summary.js";
 import type { Logger } from "../../app/logging.js";
@@ -68,6 +69,23 @@ import {
   resolveByokRemap,
 } from "./byok.js";
 
+// Hot-path patterns, compiled once at module load rather than per message.
+const MODEL_CORE_RE = /(?:[-.\w]*:)?(?:[-.\w]*\/)?([-.\w]+)(?:#[-\w,/]*)?/;
+/** `{!trigger_model}` (group 1) or a plain `{prompt_var}` (group 2). */
+const PROMPT_PLACEHOLDER_RE = /\{(?:(![A-Za-z][\w-]*_model)|([A-Za-z0-9_]+))\}/g;
+const THINKING_BLOCK_RE = /<thinking>[\s\S]*?<\/thinking>/g;
+const THINKING_TAG_RE = /<\/?thinking>/g;
+const TRAILING_NULL_SENTINEL_RE = /\n["'`]?\s*null\s*["'`]?\s*$/iu;
+const SENTINEL_QUOTES_RE = /^["'`]|["'`]$/g;
+const NULL_SENTINEL_RE = /^null$/iu;
+/** Echoed IRC-style context prefixes: "[12:34] <User>", "[model] !s <User>", "[15:00] <Bot> !q <User>". */
+const ECHOED_CONTEXT_PREFIX_RE = /^(?:\s*(?:\[[^\]]+\]\s*)?(?:![A-Za-z][\w-]*\s+)?(?:\[?\d{1,2}:\d{2}\]?\s*)?(?:<[^>]+>))*\s*/iu;
+/** Bare command-dispatch echoes like "!d caster:" — the nick part is required. */
+const COMMAND_ECHO_PREFIX_RE = /^![A-Za-z]\s+\S+[,:]\s*/u;
+const LEADING_TIMESTAMP_RE = /^\[?\d{1,2}:\d{2}\]?\s+/u;
+
+const SYSTEM_PROMPT_CACHE_MAX = 256;
+
 // ── Public types ──
 
 export type CommandExecutorLogger = Logger;
@@ -170,12 +188,20 @@ export class CommandExecutor {
   private readonly contextReducer: ContextReducer;
   private readonly refusalFallbackModel: string | null;
   private readonly responseMaxBytes: number;
+  /** Largest history window any mode may ask for — the context fetch size for resolution. */
+  private readonly maxHistorySize: number;
   private readonly eventsWatcher?: ArcEventsWatcher;
 
   private readonly agentConfig: AgentConfig;
   private readonly userKeyStore: UserKeyStore;
   private readonly userPolicyStore: UserPolicyStore;
   private readonly userCostLedger: UserCostLedger;
+  /** `{!trigger_model}` prompt variables without any @model override applied. */
+  private readonly baseTriggerModelVars: Record<string, string>;
+  /** Rendered system prompts (split around `{current_time}`) keyed by mode/nick/override/trigger. */
+  private readonly systemPromptCache = new Map<string, string[]>();
+  /** Tail of each arc's queued bot-response writes (see persistBotResponse). */
+  private readonly persistTails = new Map<string, Promise<void>>();
 
   constructor(runtime: MuaddibRuntime, roomName: string, overrides?: CommandExecutorOverrides) {
     this.runtime = runtime;
@@ -208,6 +234,19 @@ export class CommandExecutor {
       modelStrCore,
     );
 
+    this.maxHistorySize = Math.max(
+      this.commandConfig.historySize,
+      ...Object.values(this.commandConfig.modes).map((mode) => Number(mode.historySize ?? 0)),
+    );
+
+    this.baseTriggerModelVars = {};
+    for (const [trigger, modeKey] of Object.entries(this.resolver.triggerToMode)) {
+      const effectiveModel =
+        (this.resolver.triggerOverrides[trigger]?.model as string | undefined) ??
+        this.commandConfig.modes[modeKey].model;
+      this.baseTriggerModelVars[`${trigger}_model`] = modelStrCore(effectiveModel ?? "");
+    }
+
     this.runnerFactory =
       overrides?.runnerFactory ??
       ((input: CommandRunnerFactoryInput) =>
@@ -314,14 +353,9 @@ export class CommandExecutor {
   async resolveForExecution(
     message: RoomMessage,
     deliver: (text: string) => Promise<void>,
-    options?: { triggerTs?: string },
+    options?: { triggerTs?: string; parsed?: ParsedPrefix },
   ): Promise<ResolvedExecution | null> {
     const { commandConfig, logger } = this;
-    const defaultSize = commandConfig.historySize;
-    const maxSize = Math.max(
-      defaultSize,
-      ...Object.values(commandConfig.modes).map((mode) => Number(mode.historySize ?? 0)),
-    );
 
     // ── Rate limit ──
 
@@ -340,14 +374,15 @@ export class CommandExecutor {
 
     // ── Resolve command ──
 
-    const context = await this.history.getContextForMessage(message, maxSize, {
+    const context = await this.history.getContextForMessage(message, this.maxHistorySize, {
       excludeRunTs: options?.triggerTs,
     });
 
     const resolved = await this.resolver.resolve({
       message,
       context,
-      defaultSize,
+      defaultSize: commandConfig.historySize,
+      parsed: options?.parsed,
     });
 
     if (resolved.error) {
@@ -484,6 +519,28 @@ export class CommandExecutor {
     options?: {
       onAgentCreated?: (agent: Agent) => void;
       networkAccessApprover?: NetworkAccessApprover;
+      parsed?: ParsedPrefix;
+    },
+  ): Promise<void> {
+    const writes: Promise<void>[] = [];
+    try {
+      await this.runCommand(message, triggerTs, sendResponse, writes, options);
+    } finally {
+      // Replies are persisted off the delivery path; settle them before
+      // returning, and fail the command if any of them could not be written.
+      await this.flushPersistence(message.arc, writes);
+    }
+  }
+
+  private async runCommand(
+    message: RoomMessage,
+    triggerTs: string,
+    sendResponse: SendResponse,
+    writes: Promise<void>[],
+    options?: {
+      onAgentCreated?: (agent: Agent) => void;
+      networkAccessApprover?: NetworkAccessApprover;
+      parsed?: ParsedPrefix;
     },
   ): Promise<void> {
     const onAgentCreated = options?.onAgentCreated;
@@ -491,19 +548,28 @@ export class CommandExecutor {
     const { logger } = this;
 
     // ── Unified delivery: send + persist (used for all responses) ──
+    // The history write is queued rather than awaited so the agent resumes as
+    // soon as the room has the message; execute() flushes the queue on exit
+    // and rethrows the first failed write.
     const deliver = async (
       text: string,
       persistOptions?: { mode?: string },
     ): Promise<void> => {
       logger.info("Delivering response", `arc=${message.arc}`, `response=${text}`);
       const sr = await sendResponse(text);
-      await this.persistBotResponse(message.arc, message, text, sr ?? undefined, {
+      const write = this.persistBotResponse(message.arc, message, text, sr ?? undefined, {
         run: triggerTs,
         ...persistOptions,
       });
+      // Handled here only to defer it: flushPersistence() rethrows the failure.
+      write.catch(() => {});
+      writes.push(write);
     };
 
-    const result = await this.resolveForExecution(message, (text) => deliver(text), { triggerTs });
+    const result = await this.resolveForExecution(message, (text) => deliver(text), {
+      triggerTs,
+      parsed: options?.parsed,
+    });
     if (!result) return;
 
     const { modelSpec, modeKey, trigger, runtime: resolvedRuntime, modeConfig, resolved, context } = result;
@@ -579,9 +645,10 @@ export class CommandExecutor {
       );
     }
 
-    let selectedContext: Message[] = (resolved.noContext ? context.slice(-1) : context).slice(
-      -resolvedRuntime.historySize,
-    );
+    // !c keeps only the triggering message; otherwise trim to the mode's window.
+    let selectedContext: Message[] = resolved.noContext
+      ? context.slice(-1)
+      : context.slice(-resolvedRuntime.historySize);
 
     if (
       !resolved.noContext &&
@@ -693,7 +760,8 @@ export class CommandExecutor {
             }
           },
           triggerTs,
-        );
+        // Response rows land before the span's structured cost row.
+        ).finally(() => this.flushPersistence(message.arc));
 
         // Log the completed agent run with cost/context stats.
         const costStr = usage ? `$${usage.cost.total.toFixed(4)}` : "?";
@@ -759,7 +827,6 @@ export class CommandExecutor {
     // messages (e.g. "fixing dependency…") from leaking to the room.
     let lastValidResponse: string | null = null;
     let bufferedThinking: string | null = null;
-    const thinkingRe = /<thinking>[\s\S]*?<\/thinking>/g;
     const onResponse = async (text: string): Promise<void> => {
       let raw = text;
 
@@ -767,11 +834,11 @@ export class CommandExecutor {
       // cleaning, which would mangle the tags (the IRC nick-strip regex
       // matches `<thinking>` as if it were `<SomeUser>`).
       if (persistThinking) {
-        const matches = raw.match(thinkingRe);
+        const matches = raw.match(THINKING_BLOCK_RE);
         if (matches) {
-          const extracted = matches.map(m => m.replace(/<\/?thinking>/g, "")).join("\n").trim();
+          const extracted = matches.map(m => m.replace(THINKING_TAG_RE, "")).join("\n").trim();
           if (extracted) bufferedThinking = bufferedThinking ? `${bufferedThinking}\n${extracted}` : extracted;
-          raw = raw.replace(thinkingRe, "").trim();
+          raw = raw.replace(THINKING_BLOCK_RE, "").trim();
           if (!raw) return;
         }
       }
@@ -781,7 +848,7 @@ export class CommandExecutor {
       if (!cleaned || isNullSentinel(cleaned) || cleaned.startsWith("Error: ")) return;
       // Strip trailing NULL sentinel from otherwise valid content (agent
       // sometimes appends "NULL" after real output in event responses).
-      cleaned = cleaned.replace(/\n["'`]?\s*null\s*["'`]?\s*$/iu, "").trim();
+      cleaned = cleaned.replace(TRAILING_NULL_SENTINEL_RE, "").trim();
       if (!cleaned) return;
 
       lastValidResponse = cleaned;
@@ -1058,8 +1125,11 @@ export class CommandExecutor {
    * Persist a bot response to history, handling edit-coalesce vs new-message branching.
    * Constructs the bot RoomMessage explicitly — only the fields that belong on a bot message
    * are carried from the triggering user message (no `originalContent`, `secrets`, etc.).
+   *
+   * Writes are queued per arc and run strictly in call order, so callers that
+   * don't await (the reply path) still get rows in delivery order.
    */
-  private async persistBotResponse(
+  private persistBotResponse(
     arcName: string,
     message: RoomMessage,
     content: string,
@@ -1075,66 +1145,112 @@ export class CommandExecutor {
       contentTemplate?: string;
     },
   ): Promise<void> {
-    if (sendResult?.isEdit && sendResult.platformId && sendResult.combinedContent) {
-      await this.history.appendEdit(
-        arcName,
-        sendResult.platformId,
-        sendResult.combinedContent,
-        message.mynick,
-        "assistant",
-      );
-    } else {
-      const botMessage: RoomMessage = {
-        serverTag: message.serverTag,
-        channelName: message.channelName,
-        arc: message.arc,
-        nick: message.mynick,
-        mynick: message.mynick,
-        content,
-        platformId: sendResult?.platformId,
-        threadId: message.threadId,
-        responseThreadId: message.responseThreadId,
-      };
-      await this.history.addMessage(botMessage, options);
-    }
+    const write = (this.persistTails.get(arcName) ?? Promise.resolve()).then(async () => {
+      if (sendResult?.isEdit && sendResult.platformId && sendResult.combinedContent) {
+        await this.history.appendEdit(
+          arcName,
+          sendResult.platformId,
+          sendResult.combinedContent,
+          message.mynick,
+          "assistant",
+        );
+      } else {
+        const botMessage: RoomMessage = {
+          serverTag: message.serverTag,
+          channelName: message.channelName,
+          arc: message.arc,
+          nick: message.mynick,
+          mynick: message.mynick,
+          content,
+          platformId: sendResult?.platformId,
+          threadId: message.threadId,
+          responseThreadId: message.responseThreadId,
+        };
+        await this.history.addMessage(botMessage, options);
+      }
+    });
+    const tail = write.catch(() => {});
+    this.persistTails.set(arcName, tail);
+    void tail.then(() => {
+      if (this.persistTails.get(arcName) === tail) {
+        this.persistTails.delete(arcName);
+      }
+    });
+    return write;
+  }
+
+  /**
+   * Resolves once every bot response queued for `arc` so far has been written,
+   * then rejects with the first failure among `writes`.
+   */
+  private async flushPersistence(arc: string, writes: Promise<void>[] = []): Promise<void> {
+    await this.persistTails.get(arc);
+    await Promise.all(writes);
   }
 
   // ── Helpers ──
 
   buildSystemPrompt(mode: string, mynick: string, modelOverride?: string, selectedTrigger?: string): string {
+    const cacheKey = `${mode}\0${mynick}\0${modelOverride ?? ""}\0${selectedTrigger ?? ""}`;
+    let segments = this.systemPromptCache.get(cacheKey);
+    if (!segments) {
+      segments = this.renderSystemPromptSegments(mode, mynick, modelOverride, selectedTrigger);
+      if (this.systemPromptCache.size >= SYSTEM_PROMPT_CACHE_MAX) {
+        this.systemPromptCache.delete(this.systemPromptCache.keys().next().value!);
+      }
+      this.systemPromptCache.set(cacheKey, segments);
+    }
+    return segments.join(formatUtcTime() + " UTC");
+  }
+
+  /**
+   * Render the mode prompt template with every variable except `{current_time}`
+   * substituted, split around the `{current_time}` placeholders so the cached
+   * result only needs the timestamp joined in per call.
+   */
+  private renderSystemPromptSegments(
+    mode: string,
+    mynick: string,
+    modelOverride?: string,
+    selectedTrigger?: string,
+  ): string[] {
     const modeConfig = this.commandConfig.modes[mode];
     if (!modeConfig) {
       throw new Error(`Command mode '${mode}' not found in config`);
     }
 
-    let promptTemplate = modeConfig.prompt ?? "You are {mynick}. Current time: {current_time}.";
+    const promptTemplate = modeConfig.prompt ?? "You are {mynick}. Current time: {current_time}.";
 
-    const triggerModelVars: Record<string, string> = {};
-    for (const [trigger, modeKey] of Object.entries(this.resolver.triggerToMode)) {
-      const triggerOverrideModel = this.resolver.triggerOverrides[trigger]?.model as string | undefined;
-      const effectiveModel =
-        triggerOverrideModel ??
-        (modeKey === mode && modelOverride ? modelOverride : this.commandConfig.modes[modeKey].model);
-      triggerModelVars[`${trigger}_model`] = modelStrCore(effectiveModel ?? "");
+    let triggerModelVars = this.baseTriggerModelVars;
+    if (modelOverride) {
+      // @model overrides apply to this mode's triggers that don't pin their own model.
+      triggerModelVars = { ...triggerModelVars };
+      const overrideCore = modelStrCore(modelOverride);
+      for (const trigger of Object.keys(modeConfig.triggers)) {
+        if (this.resolver.triggerOverrides[trigger]?.model == null) {
+          triggerModelVars[`${trigger}_model`] = overrideCore;
+        }
+      }
     }
 
-    promptTemplate = promptTemplate.replace(
-      /\{(![A-Za-z][\w-]*_model)\}/g,
-      (_full, key: string) => triggerModelVars[key] ?? _full,
-    );
-
     const promptVars = this.runtime.config.getRoomConfig(this.roomName).promptVars ?? {};
     const vars: Record<string, string> = {
       ...promptVars,
       mynick,
-      current_time: formatUtcTime() + " UTC",
       ...(selectedTrigger ? { current_trigger: selectedTrigger } : {}),
       ...(selectedTrigger && triggerModelVars[`${selectedTrigger}_model`]
         ? { current_model: triggerModelVars[`${selectedTrigger}_model`] }
         : {}),
     };
 
-    return promptTemplate.replace(/\{([A-Za-z0-9_]+)\}/g, (full, key: string) => vars[key] ?? full);
+    // Single walk per segment resolves both trigger-model and plain variables.
+    return promptTemplate
+      .split("{current_time}")
+      .map((segment) => segment.replace(
+        PROMPT_PLACEHOLDER_RE,
+        (full, triggerKey: string | undefined, key: string | undefined) =>
+          (triggerKey ? triggerModelVars[triggerKey] : vars[key!]) ?? full,
+      ));
   }
 
   async triggerAutoChronicler(message: RoomMessage, maxSize?: number): Promise<void> {
@@ -1159,16 +1275,13 @@ export class CommandExecutor {
   private cleanResponseText(text: string, nick: string): string {
     const cleaned = text
       .trim()
-      // Strip echoed IRC-style context prefixes such as:
-      //   "[12:34] <SomeUser>"
-      //   "[claude-sonnet-4] !s <SomeUser>"
-      //   "[15:00] <Bot> !q <User>"
-      .replace(/^(?:\s*(?:\[[^\]]+\]\s*)?(?:![A-Za-z][\w-]*\s+)?(?:\[?\d{1,2}:\d{2}\]?\s*)?(?:<[^>]+>))*\s*/iu, "")
+      // Strip echoed IRC-style context prefixes.
+      .replace(ECHOED_CONTEXT_PREFIX_RE, "")
       // Strip bare command-dispatch echoes like "!d caster:" or "!d caster,"
       // while requiring the nick part so legitimate "!something" responses survive.
-      .replace(/^![A-Za-z]\s+\S+[,:]\s*/u, "")
+      .replace(COMMAND_ECHO_PREFIX_RE, "")
       // Strip bare leading timestamps echoed from Slack/Discord-style context.
-      .replace(/^\[?\d{1,2}:\d{2}\]?\s+/u, "");
+      .replace(LEADING_TIMESTAMP_RE, "");
     // Suppress internal-monologue text from room delivery.  The runner's
     // stripUndeliverableResponse (session-runner.ts) mirrors this check so
     // that a final-turn monologue triggers the empty-completion retry loop
@@ -1185,35 +1298,30 @@ export class CommandExecutor {
       return responseText;
     }
 
-    const responseBytes = Buffer.byteLength(responseText, "utf8");
-    if (responseBytes <= this.responseMaxBytes) {
+    // Encode once: the byte length decides, and the same bytes are truncated.
+    const encoded = Buffer.from(responseText, "utf-8");
+    if (encoded.length <= this.responseMaxBytes) {
       return responseText;
     }
 
     this.logger.info(
       "Response too long, creating artifact",
-      `bytes=${responseBytes}`,
+      `bytes=${encoded.length}`,
       `max_bytes=${this.responseMaxBytes}`,
     );
 
-    return await this.longResponseToArtifact(responseText);
+    return await this.longResponseToArtifact(responseText, encoded);
   }
 
-  private async longResponseToArtifact(fullResponse: string): Promise<string> {
-    const { toolsConfig, logger } = this.buildToolOptions();
-    const artifactUrl = await writeArtifactText({ toolsConfig, logger }, fullResponse, ".txt");
-
-    const trimToMaxBytes = (text: string, maxBytes: number): string => {
-      if (Buffer.byteLength(text, "utf8") <= maxBytes) {
-        return text;
-      }
-      // Slice the buffer and decode; the decoder drops any incomplete trailing character.
-      return new TextDecoder("utf-8", { fatal: false }).decode(
-        Buffer.from(text, "utf-8").subarray(0, maxBytes),
-      ).replace(/\uFFFD$/, "");
-    };
+  /** Only called for responses already measured to exceed `responseMaxBytes`; `encoded` is their UTF-8. */
+  private async longResponseToArtifact(fullResponse: string, encoded: Buffer): Promise<string> {
+    const artifactUrl = await writeArtifactText(
+      { toolsConfig: this.agentConfig.tools, logger: this.logger },
+      fullResponse,
+      ".txt",
+    );
 
-    let trimmed = trimToMaxBytes(fullResponse, this.responseMaxBytes);
+    let trimmed = truncateUtf8(encoded, this.responseMaxBytes);
 
     const minLength = Math.max(0, trimmed.length - 100);
     const lastSentence = trimmed.lastIndexOf(".");
@@ -1301,16 +1409,41 @@ export class CommandExecutor {
 
 // ── Module-level helpers ──
 
-export function modelStrCore(model: unknown): string {
-  return String(model).replace(/(?:[-.\w]*:)?(?:[-.\w]*\/)?([-.\w]+)(?:#[-\w,/]*)?/, "$1");
+/** Decode the longest prefix of `encoded` that fits `maxBytes` and ends on a character boundary. */
+function truncateUtf8(encoded: Buffer, maxBytes: number): string {
+  let end = Math.min(maxBytes, encoded.length);
+  // Back off while the first dropped byte is a continuation byte (10xxxxxx).
+  while (end > 0 && end < encoded.length && (encoded[end] & 0xc0) === 0x80) {
+    end--;
+  }
+  return encoded.toString("utf-8", 0, end);
 }
 
+const MODEL_STR_CORE_CACHE_MAX = 512;
+const modelStrCoreCache = new Map<string, string>();
 
+/**
+ * Strip provider prefix, org path and provider slug from a model spec.
+ * Memoized — callers pass the same handful of configured model strings
+ * on every prompt build and help message.
+ */
+export function modelStrCore(model: unknown): string {
+  const key = String(model);
+  let core = modelStrCoreCache.get(key);
+  if (core === undefined) {
+    core = key.replace(MODEL_CORE_RE, "$1");
+    if (modelStrCoreCache.size >= MODEL_STR_CORE_CACHE_MAX) {
+      modelStrCoreCache.delete(modelStrCoreCache.keys().next().value!);
+    }
+    modelStrCoreCache.set(key, core);
+  }
+  return core;
+}
 
 function isNullSentinel(text: string): boolean {
   const trimmed = text.trim();
-  const unquoted = trimmed.replace(/^["'`]|["'`]$/g, "").trim();
-  return /^null$/iu.test(unquoted);
+  const unquoted = trimmed.replace(SENTINEL_QUOTES_RE, "").trim();
+  return NULL_SENTINEL_RE.test(unquoted);
 }
 
 export function buildMemoryUpdatePrompt(
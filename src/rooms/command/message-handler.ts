@@ -11,7 +11,7 @@
 import { randomBytes } from "node:crypto";
 
 import type { Agent } from "@mariozechner/pi-agent-core";
-import { CommandResolver } from "./resolver.js";
+import { CommandResolver, type ParsedPrefix } from "./resolver.js";
 import { buildProactiveConfig, ProactiveRunner } from "./proactive.js";
 import {
   CommandExecutor,
@@ -51,6 +51,12 @@ function sessionKey(message: RoomMessage): string {
   return `${arc}\0${message.nick.toLowerCase()}\0`;
 }
 
+interface ActiveSteer {
+  steer: (message: RoomMessage) => void;
+  modeKey: string | null;
+  onSteered?: () => void;
+}
+
 type ApprovalCommandAction = "approve" | "deny";
 
 interface PendingNetworkApproval {
@@ -101,7 +107,9 @@ export class RoomMessageHandler {
   private readonly overrideNetworkAccessApprover?: NetworkAccessApprover;
 
   /** Active steering functions keyed by session key, with the session's resolved mode. */
-  private readonly activeSteers = new Map<string, { steer: (message: RoomMessage) => void; modeKey: string | null; onSteered?: () => void }>();
+  private readonly activeSteers = new Map<string, ActiveSteer>();
+  /** Number of activeSteers entries per arc, so per-channel checks don't scan every room's sessions. */
+  private readonly activeSessionsByArc = new Map<string, number>();
   private readonly pendingNetworkApprovals = new Map<string, PendingNetworkApproval>();
 
   constructor(
@@ -178,10 +186,11 @@ export class RoomMessageHandler {
     let breakingActiveSession = false;
 
     if (existingEntry) {
-      if (!message.isDirect || !this.resolver.shouldBreakActiveSession(message)) {
+      const parsed = this.resolver.parsePrefix(message.content);
+      if (!message.isDirect || !this.resolver.shouldBreakActiveSession(message, parsed)) {
         // Warn when an explicitly !-prefixed command is steered into a session
         // running in a different mode (the mode token is effectively ignored).
-        this.warnOnModeMismatch(message, existingEntry.modeKey, sendResponse);
+        this.warnOnModeMismatch(message, parsed, existingEntry.modeKey, sendResponse);
 
         // Regular follow-up (mode tokens, plain messages, passives) — steer
         // into the active session without blocking on history persistence.
@@ -236,15 +245,25 @@ export class RoomMessageHandler {
       // - Messages that bypass steering on their own (help, parse errors,
       //   no-context, non-steering modes/channel policies)
       const networkAccessApprover = this.createNetworkAccessApprover(message, sendResponse);
+      const parsed = this.resolver.parsePrefix(message.content);
 
-      if (breakingActiveSession || this.resolver.shouldBypassSteering(message)) {
+      if (breakingActiveSession || this.resolver.shouldBypassSteering(message, parsed)) {
         await this.executor.execute(message, triggerTs, sendResponse, {
           networkAccessApprover,
+          parsed,
         });
         return;
       }
 
-      await this.handleCommandMessage(message, triggerTs, sendResponse, networkAccessApprover, options?.onSteered);
+      await this.handleCommandMessage(
+        message,
+        key,
+        parsed,
+        triggerTs,
+        sendResponse,
+        networkAccessApprover,
+        options?.onSteered,
+      );
     } catch (error) {
       const errorMsg = error instanceof Error ? error.message : String(error);
       this.logger.error("Agent execution failed", `nick=${message.nick}`, `error=${errorMsg}`);
@@ -259,15 +278,14 @@ export class RoomMessageHandler {
 
   private async handleCommandMessage(
     message: RoomMessage,
+    key: string,
+    parsed: ParsedPrefix,
     triggerTs: string,
     sendResponse: SendResponse,
     networkAccessApprover: NetworkAccessApprover,
     onSteered?: () => void,
   ): Promise<void> {
-    const key = sessionKey(message);
-
     // Resolve the mode for this session so we can detect cross-mode steering.
-    const parsed = this.resolver.parsePrefix(message.content);
     let sessionModeKey: string | null = null;
     if (parsed.modeToken && !parsed.error && this.resolver.triggerToMode[parsed.modeToken]) {
       const { modeKey } = this.resolver.runtimeForTrigger(parsed.modeToken);
@@ -277,7 +295,7 @@ export class RoomMessageHandler {
     // Register a buffering steer function immediately so messages arriving
     // before the agent is created are captured and flushed once it's ready.
     const pending: RoomMessage[] = [];
-    this.activeSteers.set(key, { steer: (msg) => { pending.push(msg); }, modeKey: sessionModeKey, onSteered });
+    this.setActiveSteer(key, message.arc, { steer: (msg) => { pending.push(msg); }, modeKey: sessionModeKey, onSteered });
 
     // Boxed so TS control-flow narrowing doesn't collapse to `never` in finally.
     const unsubRef: { fn: (() => void) | null } = { fn: null };
@@ -285,19 +303,20 @@ export class RoomMessageHandler {
     try {
       await this.executor.execute(message, triggerTs, sendResponse, {
         networkAccessApprover,
+        parsed,
         onAgentCreated: (agent) => {
           // Flush buffered messages, then swap to direct steering.
           for (const buffered of pending) {
             this.steerAgent(agent, buffered);
           }
           pending.length = 0;
-          this.activeSteers.set(key, { steer: (msg) => { this.steerAgent(agent, msg); }, modeKey: sessionModeKey, onSteered });
+          this.setActiveSteer(key, message.arc, { steer: (msg) => { this.steerAgent(agent, msg); }, modeKey: sessionModeKey, onSteered });
 
           // Stop accepting steers once the agent has terminated; late
           // arrivals fall through to new-session routing.
           const unsubscribe = agent.subscribe((event) => {
             if (event.type !== "agent_end") return;
-            this.activeSteers.delete(key);
+            this.deleteActiveSteer(key, message.arc);
             unsubscribe();
             unsubRef.fn = null;
           });
@@ -308,7 +327,24 @@ export class RoomMessageHandler {
       // Safety fallback for paths where agent_end never fires (e.g. execute throws
       // before the agent is created).
       unsubRef.fn?.();
-      this.activeSteers.delete(key);
+      this.deleteActiveSteer(key, message.arc);
+    }
+  }
+
+  private setActiveSteer(key: string, arc: string, entry: ActiveSteer): void {
+    if (!this.activeSteers.has(key)) {
+      this.activeSessionsByArc.set(arc, (this.activeSessionsByArc.get(arc) ?? 0) + 1);
+    }
+    this.activeSteers.set(key, entry);
+  }
+
+  private deleteActiveSteer(key: string, arc: string): void {
+    if (!this.activeSteers.delete(key)) return;
+    const remaining = (this.activeSessionsByArc.get(arc) ?? 1) - 1;
+    if (remaining > 0) {
+      this.activeSessionsByArc.set(arc, remaining);
+    } else {
+      this.activeSessionsByArc.delete(arc);
     }
   }
 
@@ -341,8 +377,12 @@ export class RoomMessageHandler {
    * mode token is steered into a session running in a different mode.
    * The mode token is effectively ignored and the user should know.
    */
-  private warnOnModeMismatch(message: RoomMessage, sessionModeKey: string | null, sendResponse: SendResponse): void {
-    const parsed = this.resolver.parsePrefix(message.content);
+  private warnOnModeMismatch(
+    message: RoomMessage,
+    parsed: ParsedPrefix,
+    sessionModeKey: string | null,
+    sendResponse: SendResponse,
+  ): void {
     if (!parsed.modeToken || parsed.error || !this.resolver.triggerToMode[parsed.modeToken]) return;
 
     const incomingModeKey = this.resolver.runtimeForTrigger(parsed.modeToken).modeKey;
@@ -492,11 +532,7 @@ export class RoomMessageHandler {
 
   /** Check if any command session is active for the given channel arc (serverTag#channelName). */
   private hasActiveCommandSessionForChannel(arc: string): boolean {
-    const prefix = `${arc}\0`;
-    for (const key of this.activeSteers.keys()) {
-      if (key.startsWith(prefix)) return true;
-    }
-    return false;
+    return this.activeSessionsByArc.has(arc);
   }
 
   // ── Session lifecycle: passives ──
@@ -29,6 +29,9 @@ import { withPersistedCostSpan } from "../../cost/cost-span.js";
 import type { UserCostLedger } from "../../cost/user-cost-ledger.js";
 import { LLM_CALL_TYPE } from "../../cost/llm-call-type.js";
 
+const SCORE_RE = /(\d+)\/10/;
+const IRC_NICK_LOOSE_RE = /<?\S+>\s*(.*)/;
+
 // ── ProactiveConfig (resolved, all fields required) ──
 
 export interface ProactiveConfig {
@@ -196,7 +199,7 @@ export class ProactiveRunner {
     if (!this.activeDebounces.has(channelKey)) {
       this.runtime.logger.withMessageContext(
         { arc: message.arc, nick: "proactive", message: message.content },
-        () => this.runSession(message, sendResponse, hasActiveCommandSession),
+        () => this.runSession(message, channelKey, sendResponse, hasActiveCommandSession),
       ).catch((error) => {
         this.logger.error("Proactive session failed", error);
       });
@@ -211,11 +214,11 @@ export class ProactiveRunner {
    */
   private async runSession(
     message: RoomMessage,
+    channelKey: string,
     sendResponse: SendResponse,
     hasActiveCommandSession: () => boolean,
   ): Promise<void> {
     const debounceMs = this.config.debounceSeconds * 1000;
-    const channelKey = CommandResolver.channelKey(message.serverTag, message.channelName);
 
     this.activeDebounces.add(channelKey);
     const signal = this.abortController.signal;
@@ -411,7 +414,7 @@ export async function evaluateProactiveInterjection(
         return { shouldInterject: false, reason: `No response from validation model ${i + 1}` };
       }
 
-      const scoreMatch = validationText.match(/(\d+)\/10/);
+      const scoreMatch = validationText.match(SCORE_RE);
       if (!scoreMatch) {
         logger?.warn(
           "No valid score in proactive response",
@@ -480,6 +483,6 @@ export async function evaluateProactiveInterjection(
 
 function extractCurrentMessage(message: Message): string {
   const text = messageText(message);
-  const match = text.match(/<?\S+>\s*(.*)/);
+  const match = text.match(IRC_NICK_LOOSE_RE);
   return match ? match[1].trim() : text;
 }
@@ -1,29 +1,35 @@
+/**
+ * Token bucket: holds up to `rate` tokens, refilled continuously at
+ * `rate / period` tokens per second; each allowed call spends one token.
+ */
 export class RateLimiter {
-  private resetTime = 0;
-  private count = 0;
+  private tokens: number;
+  private lastRefill?: number;
 
   constructor(
     private readonly rate = 30,
     private readonly period = 900,
-    private readonly nowSeconds: () => number = () => Date.now() / 1000,
-  ) {}
+    private readonly nowSeconds: () => number = () => performance.now() / 1000,
+  ) {
+    this.tokens = rate;
+  }
 
   checkLimit(): boolean {
-    if (this.rate <= 0) {
+    if (this.rate <= 0 || this.period <= 0) {
       return true;
     }
 
     const now = this.nowSeconds();
-    if (now >= this.resetTime) {
-      this.resetTime = now + this.period;
-      this.count = 0;
+    if (this.lastRefill !== undefined) {
+      this.tokens = Math.min(this.rate, this.tokens + ((now - this.lastRefill) * this.rate) / this.period);
     }
+    this.lastRefill = now;
 
-    if (this.count >= this.rate) {
+    if (this.tokens < 1) {
       return false;
     }
 
-    this.count += 1;
+    this.tokens -= 1;
     return true;
   }
 }
@@ -4,6 +4,20 @@ import { buildArc, type RoomMessage } from "../message.js";
 
 export type { CommandConfig, ModeConfig };
 
+const PREFIX_TOKEN_RE = /\S+/g;
+const PARSED_PREFIX_CACHE_MAX = 256;
+const CHANNEL_CACHE_MAX = 1024;
+const channelKeyCache = new Map<string, string>();
+
+/** Insert into a bounded memo map, evicting the oldest entry at capacity. */
+function rememberBounded<V>(cache: Map<string, V>, key: string, value: V, max: number): void {
+  if (cache.size >= max) {
+    cache.delete(cache.keys().next().value!);
+  }
+  cache.set(key, value);
+}
+
+type PrefixTokenKind = "flag" | "mode" | "builtin";
 
 export interface ParsedPrefix {
   noContext: boolean;
@@ -43,18 +57,57 @@ export interface RuntimeSettings {
   toolsOverrides: Record<string, unknown> | null;
 }
 
+/** How a channel-mode string selects a trigger, classified once per distinct mode string. */
+type ChannelModePolicy =
+  | { kind: "classifier" }
+  | { kind: "constrained"; mode: string }
+  | { kind: "trigger"; trigger: string }
+  | { kind: "unknown"; error: string };
+
+/**
+ * A command carrying only its parsed prefix, with every other field at its
+ * empty value.  All ResolvedCommand objects are spread from this, so they share
+ * one property layout regardless of which resolution branch produced them.
+ */
+function unresolvedCommand(parsed: ParsedPrefix): ResolvedCommand {
+  return {
+    noContext: parsed.noContext,
+    queryText: parsed.queryText,
+    modelOverride: parsed.modelOverride,
+    selectedLabel: null,
+    selectedTrigger: null,
+    builtinCommand: null,
+    modeKey: null,
+    runtime: null,
+    error: undefined,
+    helpRequested: false,
+    channelMode: undefined,
+    selectedAutomatically: false,
+  };
+}
+
 export class CommandResolver {
   readonly triggerToMode: Record<string, string> = {};
   readonly triggerOverrides: Record<string, Record<string, unknown>> = {};
   readonly defaultTriggerByMode: Record<string, string> = {};
   readonly classifierLabelToTrigger: Record<string, string>;
   readonly fallbackClassifierLabel: string;
+  private readonly runtimeByTrigger = new Map<string, { modeKey: string; runtime: RuntimeSettings }>();
+  private readonly parsedPrefixCache = new Map<string, ParsedPrefix>();
+  private readonly channelModeCache = new Map<string, string>();
+  /** Every recognized prefix token, classified once so the scan does one lookup per token. */
+  private readonly prefixTokenKinds = new Map<string, PrefixTokenKind>();
+  /** First characters that can open a command prefix; anything else is plain chat. */
+  private readonly prefixFirstChars: ReadonlySet<string>;
+  private modesHelpFragment?: string;
+  private readonly helpMessageByChannelMode = new Map<string, string>();
+  private readonly channelPolicyByMode = new Map<string, ChannelModePolicy>();
 
   constructor(
     private readonly commandConfig: CommandConfig,
     private readonly classifyModeFn: (context: Message[]) => Promise<string>,
     private readonly helpToken: string,
-    private readonly flagTokens: Set<string>,
+    flagTokens: Set<string>,
     private readonly modelNameFormatter: (value: unknown) => string,
     private readonly builtinTokens: Set<string> = new Set(["!setkey", "!balance", "!setmodel"]),
   ) {
@@ -77,6 +130,10 @@ export class CommandResolver {
 
         this.triggerToMode[trigger] = modeKey;
         this.triggerOverrides[trigger] = triggers[trigger] ?? {};
+        this.runtimeByTrigger.set(trigger, {
+          modeKey,
+          runtime: this.buildRuntime(modeConfig, this.triggerOverrides[trigger]),
+        });
       }
     }
 
@@ -99,45 +156,77 @@ export class CommandResolver {
         `Classifier fallback label '${this.fallbackClassifierLabel}' is not defined in labels`,
       );
     }
+
+    for (const trigger of Object.keys(this.triggerToMode)) {
+      this.prefixTokenKinds.set(trigger, "mode");
+    }
+    this.prefixTokenKinds.set(helpToken, "mode");
+    for (const token of builtinTokens) {
+      this.prefixTokenKinds.set(token, "builtin");
+    }
+    // Flags take precedence over any mode token of the same name.
+    for (const token of flagTokens) {
+      this.prefixTokenKinds.set(token, "flag");
+    }
+
+    this.prefixFirstChars = new Set(
+      ["!", "@", ...this.prefixTokenKinds.keys()].filter(Boolean).map((token) => token[0]),
+    );
   }
 
+  /**
+   * Parse the leading flag / mode / @model tokens of a message.  A single
+   * message is parsed several times on its way through the handler
+   * (sanitizing, steering bypass, resolve), so results are memoized by
+   * content; the returned object is shared and must not be mutated.
+   * Builtin-command parses are never cached: their arguments may carry
+   * secrets (e.g. !setkey) that must not outlive the message.
+   */
   parsePrefix(message: string): ParsedPrefix {
+    // Fast path for plain chat (the vast majority of messages): no scan, no cache entry.
     const text = message.trim();
-    if (!text) {
-      return {
-        noContext: false,
-        modeToken: null,
-        modelOverride: null,
-        queryText: "",
-        error: null,
-      };
+    if (!this.prefixFirstChars.has(text[0])) {
+      return { noContext: false, modeToken: null, modelOverride: null, queryText: text, error: null };
     }
 
-    const tokens = text.split(/\s+/);
+    let parsed = this.parsedPrefixCache.get(message);
+    if (!parsed) {
+      parsed = this.scanPrefix(text);
+      if (!this.isBuiltinCommandToken(parsed.modeToken)) {
+        rememberBounded(this.parsedPrefixCache, message, parsed, PARSED_PREFIX_CACHE_MAX);
+      }
+    }
+    return parsed;
+  }
+
+  /** Scan trimmed `text` lazily, stopping at the first token that is not part of the prefix. */
+  private scanPrefix(text: string): ParsedPrefix {
     let noContext = false;
     let modeToken: string | null = null;
     let modelOverride: string | null = null;
     let error: string | null = null;
-    let consumed = 0;
+    let consumedEnd = 0;
 
-    for (let i = 0; i < tokens.length; i += 1) {
-      const token = tokens[i];
+    for (const match of text.matchAll(PREFIX_TOKEN_RE)) {
+      const token = match[0];
+      const tokenEnd = match.index + token.length;
+      const kind = this.prefixTokenKinds.get(token);
 
-      if (this.flagTokens.has(token)) {
+      if (kind === "flag") {
         noContext = true;
-        consumed = i + 1;
+        consumedEnd = tokenEnd;
         continue;
       }
 
-      if (this.triggerToMode[token] || token === this.helpToken || this.builtinTokens.has(token)) {
+      if (kind !== undefined) {
         if (modeToken !== null) {
           error = "Only one mode command allowed.";
           break;
         }
         modeToken = token;
-        consumed = i + 1;
+        consumedEnd = tokenEnd;
         // Builtin commands consume everything after as arguments — stop prefix parsing.
-        if (this.builtinTokens.has(token)) {
+        if (kind === "builtin") {
           break;
         }
         continue;
@@ -147,7 +236,7 @@ export class CommandResolver {
         if (modelOverride === null) {
           modelOverride = token.slice(1);
         }
-        consumed = i + 1;
+        consumedEnd = tokenEnd;
         continue;
       }
 
@@ -159,50 +248,53 @@ export class CommandResolver {
       break;
     }
 
-    const queryText = consumed > 0 ? tokens.slice(consumed).join(" ") : text;
+    // Slice the original text so the query keeps its own whitespace (newlines, indentation).
+    const queryText = consumedEnd > 0 ? text.slice(consumedEnd).trimStart() : text;
     return { noContext, modeToken, modelOverride, queryText, error };
   }
 
+  /**
+   * Mode key and runtime settings for a trigger.  Precomputed at construction
+   * (config is immutable at runtime), so the returned settings are shared and
+   * must be treated as read-only.
+   */
   runtimeForTrigger(trigger: string): { modeKey: string; runtime: RuntimeSettings } {
-    const modeKey = this.triggerToMode[trigger];
-    if (!modeKey) {
+    const entry = this.runtimeByTrigger.get(trigger);
+    if (!entry) {
       throw new Error(`Unknown trigger '${trigger}'`);
     }
+    return entry;
+  }
 
-    const modeConfig = this.commandConfig.modes[modeKey];
-    const overrides = this.triggerOverrides[trigger] ?? {};
-
+  private buildRuntime(modeConfig: ModeConfig, overrides: Record<string, unknown>): RuntimeSettings {
     return {
-      modeKey,
-      runtime: {
-        reasoningEffort:
-          (overrides.reasoningEffort as string | undefined) ?? modeConfig.reasoningEffort ?? "minimal",
-        allowedTools:
-          (overrides.allowedTools as string[] | undefined) ?? modeConfig.allowedTools ?? null,
-        steering: (overrides.steering as boolean | undefined) ?? modeConfig.steering ?? true,
-        autoReduceContext:
-          (overrides.autoReduceContext as boolean | undefined) ??
-          modeConfig.autoReduceContext ??
-          false,
-        includeChapterSummary:
-          (overrides.includeChapterSummary as boolean | undefined) ??
-          modeConfig.includeChapterSummary ??
-          true,
-        memoryUpdate:
-          (overrides.memoryUpdate as boolean | undefined) ??
-          modeConfig.memoryUpdate ??
-          true,
-        toolSummary:
-          (overrides.toolSummary as boolean | undefined) ??
-          modeConfig.toolSummary ??
-          true,
-        model: (overrides.model as string | undefined) ?? null,
-        visionModel:
-          (overrides.visionModel as string | undefined) ?? modeConfig.visionModel ?? null,
-        historySize: Number(modeConfig.historySize ?? this.commandConfig.historySize),
-        toolsOverrides:
-          (overrides.tools as Record<string, unknown> | undefined) ?? null,
-      },
+      reasoningEffort:
+        (overrides.reasoningEffort as string | undefined) ?? modeConfig.reasoningEffort ?? "minimal",
+      allowedTools:
+        (overrides.allowedTools as string[] | undefined) ?? modeConfig.allowedTools ?? null,
+      steering: (overrides.steering as boolean | undefined) ?? modeConfig.steering ?? true,
+      autoReduceContext:
+        (overrides.autoReduceContext as boolean | undefined) ??
+        modeConfig.autoReduceContext ??
+        false,
+      includeChapterSummary:
+        (overrides.includeChapterSummary as boolean | undefined) ??
+        modeConfig.includeChapterSummary ??
+        true,
+      memoryUpdate:
+        (overrides.memoryUpdate as boolean | undefined) ??
+        modeConfig.memoryUpdate ??
+        true,
+      toolSummary:
+        (overrides.toolSummary as boolean | undefined) ??
+        modeConfig.toolSummary ??
+        true,
+      model: (overrides.model as string | undefined) ?? null,
+      visionModel:
+        (overrides.visionModel as string | undefined) ?? modeConfig.visionModel ?? null,
+      historySize: Number(modeConfig.historySize ?? this.commandConfig.historySize),
+      toolsOverrides:
+        (overrides.tools as Record<string, unknown> | undefined) ?? null,
     };
   }
 
@@ -220,14 +312,27 @@ export class CommandResolver {
     return serverTag;
   }
 
+  /** Memoized — computed for every inbound message, over a small set of channels. */
   static channelKey(serverTag: string, channelName: string): string {
-    return buildArc(CommandResolver.normalizeServerTag(serverTag), channelName);
+    const cacheKey = `${serverTag}\0${channelName}`;
+    let key = channelKeyCache.get(cacheKey);
+    if (key === undefined) {
+      key = buildArc(CommandResolver.normalizeServerTag(serverTag), channelName);
+      rememberBounded(channelKeyCache, cacheKey, key, CHANNEL_CACHE_MAX);
+    }
+    return key;
   }
 
   getChannelMode(serverTag: string, channelName: string): string {
-    const channelModes = this.commandConfig.channelModes ?? {};
-    const key = CommandResolver.channelKey(serverTag, channelName);
-    return channelModes[key] ?? this.commandConfig.defaultMode ?? "classifier";
+    const cacheKey = `${serverTag}\0${channelName}`;
+    let mode = this.channelModeCache.get(cacheKey);
+    if (mode === undefined) {
+      const channelModes = this.commandConfig.channelModes ?? {};
+      const key = CommandResolver.channelKey(serverTag, channelName);
+      mode = channelModes[key] ?? this.commandConfig.defaultMode ?? "classifier";
+      rememberBounded(this.channelModeCache, cacheKey, mode, CHANNEL_CACHE_MAX);
+    }
+    return mode;
   }
 
   /**
@@ -236,8 +341,7 @@ export class CommandResolver {
    * signals qualify: !c (no-context), @model override, help, or parse errors.
    * Regular mode tokens (!s, !d, !a, …) do NOT break — they steer as follow-ups.
    */
-  shouldBreakActiveSession(message: RoomMessage): boolean {
-    const parsed = this.parsePrefix(message.content);
+  shouldBreakActiveSession(message: RoomMessage, parsed = this.parsePrefix(message.content)): boolean {
     return Boolean(
       parsed.error ||
       parsed.noContext ||
@@ -247,9 +351,7 @@ export class CommandResolver {
     );
   }
 
-  shouldBypassSteering(message: RoomMessage): boolean {
-    const parsed = this.parsePrefix(message.content);
-
+  shouldBypassSteering(message: RoomMessage, parsed = this.parsePrefix(message.content)): boolean {
     if (parsed.error || parsed.noContext) {
       return true;
     }
@@ -263,15 +365,9 @@ export class CommandResolver {
       return !runtime.steering;
     }
 
-    const channelMode = this.getChannelMode(message.serverTag, message.channelName);
-    let trigger = channelMode;
-
-    if (!this.triggerToMode[trigger] && this.commandConfig.modes[trigger]) {
-      trigger = this.defaultTriggerByMode[trigger];
-    }
-
-    if (this.triggerToMode[trigger]) {
-      const { runtime } = this.runtimeForTrigger(trigger);
+    const policy = this.channelPolicy(this.getChannelMode(message.serverTag, message.channelName));
+    if (policy.kind === "trigger") {
+      const { runtime } = this.runtimeForTrigger(policy.trigger);
       return !runtime.steering;
     }
 
@@ -282,13 +378,24 @@ export class CommandResolver {
     return token != null && this.builtinTokens.has(token);
   }
 
+  /** Memoized per channel mode — the modes section never changes and the rest depends only on the mode. */
   buildHelpMessage(serverTag: string, channelName: string): string {
     const channelMode = this.getChannelMode(serverTag, channelName);
-    const classifierModel = this.commandConfig.modeClassifier.model;
-
-    const defaultDescription = this.describeDefaultMode(channelMode, classifierModel);
+    let help = this.helpMessageByChannelMode.get(channelMode);
+    if (help === undefined) {
+      const classifierModel = this.commandConfig.modeClassifier.model;
+      const defaultDescription = this.describeDefaultMode(channelMode, classifierModel);
+      this.modesHelpFragment ??= this.buildModesHelpFragment();
+      help = `${
+        `default is ${defaultDescription}; modes: ${this.modesHelpFragment}; `
+      }use @modelid to override model; !c disables context; !balance shows your budget status; !setmodel remaps prefixes to your own model (BYOK)`;
+      this.helpMessageByChannelMode.set(channelMode, help);
+    }
+    return help;
+  }
 
-    const modeParts = Object.entries(this.commandConfig.modes)
+  private buildModesHelpFragment(): string {
+    return Object.entries(this.commandConfig.modes)
       .flatMap(([modeKey, modeConfig]) => {
         const triggers = Object.keys(modeConfig.triggers);
         if (triggers.length === 0) {
@@ -309,154 +416,115 @@ export class CommandResolver {
         return [`${triggers.join("/")} = ${modeKey} (${modelDescription})`];
       })
       .join(", ");
-
-    return `${
-      `default is ${defaultDescription}; modes: ${modeParts}; `
-    }use @modelid to override model; !c disables context; !balance shows your budget status; !setmodel remaps prefixes to your own model (BYOK)`;
   }
 
   async resolve(input: {
     message: RoomMessage;
     context: Message[];
     defaultSize: number;
+    /** Prefix already parsed by the caller for this message's content. */
+    parsed?: ParsedPrefix;
   }): Promise<ResolvedCommand> {
-    const parsed = this.parsePrefix(input.message.content);
+    const parsed = input.parsed ?? this.parsePrefix(input.message.content);
+    const base = unresolvedCommand(parsed);
     if (parsed.error) {
-      return {
-        noContext: parsed.noContext,
-        queryText: parsed.queryText,
-        modelOverride: parsed.modelOverride,
-        selectedLabel: null,
-        selectedTrigger: null,
-        builtinCommand: null,
-        modeKey: null,
-        runtime: null,
-        error: parsed.error,
-        helpRequested: false,
-        selectedAutomatically: false,
-      };
+      return { ...base, error: parsed.error };
     }
 
     if (parsed.modeToken === this.helpToken) {
-      return {
-        noContext: parsed.noContext,
-        queryText: parsed.queryText,
-        modelOverride: parsed.modelOverride,
-        selectedLabel: null,
-        selectedTrigger: null,
-        builtinCommand: null,
-        modeKey: null,
-        runtime: null,
-        helpRequested: true,
-        selectedAutomatically: false,
-      };
+      return { ...base, helpRequested: true };
     }
 
     if (this.isBuiltinCommandToken(parsed.modeToken)) {
-      return {
-        noContext: parsed.noContext,
-        queryText: parsed.queryText,
-        modelOverride: parsed.modelOverride,
-        selectedLabel: null,
-        selectedTrigger: null,
-        builtinCommand: parsed.modeToken,
-        modeKey: null,
-        runtime: null,
-        helpRequested: false,
-        selectedAutomatically: false,
-      };
+      return { ...base, builtinCommand: parsed.modeToken };
     }
 
     if (parsed.modeToken) {
       const { modeKey, runtime } = this.runtimeForTrigger(parsed.modeToken);
       return {
-        noContext: parsed.noContext,
-        queryText: parsed.queryText,
-        modelOverride: parsed.modelOverride,
+        ...base,
         selectedLabel: parsed.modeToken,
         selectedTrigger: parsed.modeToken,
-        builtinCommand: null,
         modeKey,
         runtime,
-        helpRequested: false,
-        selectedAutomatically: false,
       };
     }
 
     const channelMode = this.getChannelMode(input.message.serverTag, input.message.channelName);
+    const policy = this.channelPolicy(channelMode);
 
     let selectedLabel: string;
     let selectedTrigger: string;
 
-    if (channelMode === "classifier") {
-      selectedLabel = await this.classifyMode(input.context);
-      selectedTrigger = this.triggerForLabel(selectedLabel);
-    } else if (channelMode.startsWith("classifier:")) {
-      const constrainedMode = channelMode.split(":", 2)[1];
-      if (!this.commandConfig.modes[constrainedMode]) {
-        return {
-          noContext: parsed.noContext,
-          queryText: parsed.queryText,
-          modelOverride: parsed.modelOverride,
-          selectedLabel: null,
-          selectedTrigger: null,
-          builtinCommand: null,
-          modeKey: null,
-          runtime: null,
-          error: `Unknown channel mode policy '${channelMode}': mode '${constrainedMode}' missing`,
-          helpRequested: false,
-          channelMode,
-          selectedAutomatically: true,
-        };
+    switch (policy.kind) {
+      case "classifier":
+        selectedLabel = await this.classifyMode(input.context);
+        selectedTrigger = this.triggerForLabel(selectedLabel);
+        break;
+      case "constrained": {
+        selectedLabel = await this.classifyMode(input.context.slice(-input.defaultSize));
+        selectedTrigger = this.triggerForLabel(selectedLabel);
+        const { modeKey: selectedMode } = this.runtimeForTrigger(selectedTrigger);
+        if (selectedMode !== policy.mode) {
+          selectedTrigger = this.defaultTriggerByMode[policy.mode];
+          selectedLabel = selectedTrigger;
+        }
+        break;
       }
-
-      selectedLabel = await this.classifyMode(input.context.slice(-input.defaultSize));
-      selectedTrigger = this.triggerForLabel(selectedLabel);
-      const { modeKey: selectedMode } = this.runtimeForTrigger(selectedTrigger);
-      if (selectedMode !== constrainedMode) {
-        selectedTrigger = this.defaultTriggerByMode[constrainedMode];
+      case "trigger":
+        selectedTrigger = policy.trigger;
         selectedLabel = selectedTrigger;
-      }
-    } else if (this.triggerToMode[channelMode]) {
-      selectedTrigger = channelMode;
-      selectedLabel = selectedTrigger;
-    } else if (this.commandConfig.modes[channelMode]) {
-      selectedTrigger = this.defaultTriggerByMode[channelMode];
-      selectedLabel = selectedTrigger;
-    } else {
-      return {
-        noContext: parsed.noContext,
-        queryText: parsed.queryText,
-        modelOverride: parsed.modelOverride,
-        selectedLabel: null,
-        selectedTrigger: null,
-        builtinCommand: null,
-        modeKey: null,
-        runtime: null,
-        error: `Unknown channel mode policy '${channelMode}'`,
-        helpRequested: false,
-        channelMode,
-        selectedAutomatically: true,
-      };
+        break;
+      case "unknown":
+        return { ...base, error: policy.error, channelMode, selectedAutomatically: true };
     }
 
     const { modeKey, runtime } = this.runtimeForTrigger(selectedTrigger);
 
     return {
-      noContext: parsed.noContext,
-      queryText: parsed.queryText,
-      modelOverride: parsed.modelOverride,
+      ...base,
       selectedLabel,
       selectedTrigger,
-      builtinCommand: null,
       modeKey,
       runtime,
-      helpRequested: false,
       channelMode,
       selectedAutomatically: true,
     };
   }
 
+  /** Classify a channel-mode string against the command config; memoized since config is fixed. */
+  private channelPolicy(channelMode: string): ChannelModePolicy {
+    let policy = this.channelPolicyByMode.get(channelMode);
+    if (!policy) {
+      policy = this.classifyChannelMode(channelMode);
+      this.channelPolicyByMode.set(channelMode, policy);
+    }
+    return policy;
+  }
+
+  private classifyChannelMode(channelMode: string): ChannelModePolicy {
+    if (channelMode === "classifier") {
+      return { kind: "classifier" };
+    }
+    if (channelMode.startsWith("classifier:")) {
+      const constrainedMode = channelMode.split(":", 2)[1];
+      if (!this.commandConfig.modes[constrainedMode]) {
+        return {
+          kind: "unknown",
+          error: `Unknown channel mode policy '${channelMode}': mode '${constrainedMode}' missing`,
+        };
+      }
+      return { kind: "constrained", mode: constrainedMode };
+    }
+    if (this.triggerToMode[channelMode]) {
+      return { kind: "trigger", trigger: channelMode };
+    }
+    if (this.commandConfig.modes[channelMode]) {
+      return { kind: "trigger", trigger: this.defaultTriggerByMode[channelMode] };
+    }
+    return { kind: "unknown", error: `Unknown channel mode policy '${channelMode}'` };
+  }
+
   private async classifyMode(context: Message[]): Promise<string> {
     return this.classifyModeFn(context);
   }
@@ -5,7 +5,7 @@ import { appendAttachmentBlock, escapeRegExp, normalizeName, nowMonotonicSeconds
 import type { MuaddibRuntime } from "../../runtime.js";
 import { RoomMessageHandler } from "../command/message-handler.js";
 import { InFlightTaskSet } from "../in-flight-task-set.js";
-import { type RoomMessage, buildArc, matchPlatformAllowlist } from "../message.js";
+import { type RoomMessage, buildArc, type AllowlistMatcher, compilePlatformAllowlist } from "../message.js";
 import type { RoomGateway } from "../room-gateway.js";
 import {
   sendWithRetryResult,
@@ -112,6 +112,9 @@ export interface DiscordRoomMonitorOptions {
 export class DiscordRoomMonitor {
   private readonly logger: Logger;
   private readonly logWriter?: RuntimeLogWriter;
+  private readonly ignoreUsersLower: ReadonlySet<string>;
+  /** Undefined when the room has no userAllowlist (trust is then left unset). */
+  private readonly allowlistMatcher?: AllowlistMatcher;
 
   static async fromRuntime(
     runtime: MuaddibRuntime,
@@ -193,6 +196,9 @@ export class DiscordRoomMonitor {
   constructor(private readonly options: DiscordRoomMonitorOptions) {
     this.logger = options.logger ?? CONSOLE_LOGGER;
     this.logWriter = options.logWriter;
+    this.ignoreUsersLower = new Set((options.ignoreUsers ?? []).map((u) => u.toLowerCase()));
+    const userAllowlist = options.roomConfig.userAllowlist;
+    this.allowlistMatcher = userAllowlist ? compilePlatformAllowlist(userAllowlist) : undefined;
   }
 
   async run(): Promise<void> {
@@ -288,8 +294,7 @@ export class DiscordRoomMonitor {
       return;
     }
 
-    const ignoreUsers = this.options.ignoreUsers ?? [];
-    if (ignoreUsers.some((u) => u.toLowerCase() === event.username.toLowerCase())) {
+    if (this.ignoreUsersLower.has(event.username.toLowerCase())) {
       return;
     }
 
@@ -311,10 +316,9 @@ export class DiscordRoomMonitor {
         ? `discord:${event.guildId}`
         : "discord:_DM";
 
-    const userAllowlist = this.options.roomConfig.userAllowlist;
-    const trusted = userAllowlist
-      ? matchPlatformAllowlist(event.authorId ? `${normalizeName(event.username)}_${event.authorId}` : undefined, userAllowlist)
-      : undefined;
+    const trusted = this.allowlistMatcher?.(
+      event.authorId ? `${normalizeName(event.username)}_${event.authorId}` : undefined,
+    );
 
     const channelName = event.channelName ?? event.channelId;
     const message: RoomMessage = {
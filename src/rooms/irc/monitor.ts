@@ -5,7 +5,7 @@ import { escapeRegExp, requireNonEmptyString, sleep } from "../../utils/index.js
 import type { MuaddibRuntime } from "../../runtime.js";
 import { RoomMessageHandler } from "../command/message-handler.js";
 import { InFlightTaskSet } from "../in-flight-task-set.js";
-import { buildArc, matchIrcAllowlist, type RoomMessage } from "../message.js";
+import { type AllowlistMatcher, buildArc, compileIrcAllowlist, type RoomMessage } from "../message.js";
 import type { RoomGateway } from "../room-gateway.js";
 import { VarlinkClient, VarlinkSender } from "./varlink.js";
 import type { ArcEventsWatcher } from "../../events/watcher.js";
@@ -63,6 +63,9 @@ export class IrcRoomMonitor {
   private readonly logger: Logger;
   private readonly logWriter?: RuntimeLogWriter;
   private readonly serverNicks = new Map<string, string>();
+  private readonly ignoreUsersLower: ReadonlySet<string>;
+  /** Undefined when the room has no userAllowlist (trust is then left unset). */
+  private readonly allowlistMatcher?: AllowlistMatcher;
   private readyResolve?: () => void;
   private readyReject?: (err: Error) => void;
   readonly ready = new Promise<void>((resolve, reject) => {
@@ -152,6 +155,9 @@ export class IrcRoomMonitor {
     this.responseCleaner = options.responseCleaner ?? defaultResponseCleaner;
     this.logger = options.logger ?? CONSOLE_LOGGER;
     this.logWriter = options.logWriter;
+    this.ignoreUsersLower = new Set((options.ignoreUsers ?? []).map((u) => u.toLowerCase()));
+    const userAllowlist = options.roomConfig.userAllowlist;
+    this.allowlistMatcher = userAllowlist ? compileIrcAllowlist(userAllowlist) : undefined;
   }
 
   async run(): Promise<void> {
@@ -237,10 +243,9 @@ export class IrcRoomMonitor {
       this.logger.debug("Normalized bridged IRC sender", `from=${nick}`, `to=${normalizedNick}`);
     }
 
-    const ignoreUsers = this.options.ignoreUsers ?? [];
     if (
-      ignoreUsers.some((u) => u.toLowerCase() === nick.toLowerCase()) ||
-      ignoreUsers.some((u) => u.toLowerCase() === normalizedNick.toLowerCase())
+      this.ignoreUsersLower.has(nick.toLowerCase()) ||
+      this.ignoreUsersLower.has(normalizedNick.toLowerCase())
     ) {
       this.logger.debug("Ignoring user", `nick=${nick}`, `normalized=${normalizedNick}`);
       return;
@@ -252,10 +257,7 @@ export class IrcRoomMonitor {
 
     const cleanedMessage = inputMatch?.groups?.content ?? normalizedMessage;
 
-    const userAllowlist = this.options.roomConfig.userAllowlist;
-    const trusted = userAllowlist
-      ? matchIrcAllowlist(event.hostmask, userAllowlist)
-      : undefined;
+    const trusted = this.allowlistMatcher?.(event.hostmask);
 
     const roomMessage: RoomMessage = {
       serverTag: server,
@@ -379,6 +381,8 @@ function normalizeSenderAndMessage(nick: string, message: string): [string, stri
   return [bridgedNick, bridgedContent];
 }
 
+const NEWLINE_RUN_RE = /\n+/g;
+
 function defaultResponseCleaner(text: string): string {
-  return text.replace(/\n+/g, " ; ").trim() || text;
+  return text.replace(NEWLINE_RUN_RE, " ; ").trim() || text;
 }
@@ -27,30 +27,37 @@ export function buildArc(serverTag: string, channelName: string): string {
   return raw.replaceAll("%", "%25").replaceAll("/", "%2F");
 }
 
+/** Allowlist check compiled once per room; returns false if the identifier is unavailable. */
+export type AllowlistMatcher = (identifier: string | undefined) => boolean;
+
 /**
- * Check if a user identifier matches any entry in a platform allowlist (case-insensitive exact match).
- * Used by Discord and Slack monitors. Returns false if identifier is unavailable.
+ * Compile a platform allowlist (case-insensitive exact match) into a set lookup.
+ * Used by Discord and Slack monitors.
  */
-export function matchPlatformAllowlist(identifier: string | undefined, allowlist: string[]): boolean {
-  if (!identifier) return false;
-  const lower = identifier.toLowerCase();
-  return allowlist.some((entry) => entry.toLowerCase() === lower);
+export function compilePlatformAllowlist(allowlist: string[]): AllowlistMatcher {
+  const allowed = new Set(allowlist.map((entry) => entry.toLowerCase()));
+  return (identifier) => Boolean(identifier) && allowed.has(identifier!.toLowerCase());
 }
 
 /**
- * Check if a hostmask matches any pattern in an IRC allowlist.
- * Patterns use glob-style `*` wildcards (e.g. `*!*@unaffiliated/pasky`).
- * Returns false if hostmask is unavailable.
+ * Compile an IRC hostmask allowlist into a single anchored regex.
+ * Patterns use glob-style `*` wildcards (e.g. `*!*@unaffiliated/pasky`);
+ * every other character, `?` included, matches literally, so no entry can
+ * produce an invalid regex and take the whole room down at startup.
  */
-export function matchIrcAllowlist(hostmask: string | undefined, allowlist: string[]): boolean {
-  if (!hostmask) return false;
-  return allowlist.some((pattern) => {
-    const regex = new RegExp(
-      "^" + pattern.replace(/[.+^${}()|[\]\\]/g, "\\$&").replace(/\*/g, ".*") + "$",
-      "i",
-    );
-    return regex.test(hostmask);
-  });
+export function compileIrcAllowlist(allowlist: string[]): AllowlistMatcher {
+  if (allowlist.length === 0) {
+    return () => false;
+  }
+  const regex = new RegExp(
+    "^(?:" +
+      allowlist
+        .map((pattern) => pattern.replace(/[.+?^${}()|[\]\\]/g, "\\$&").replace(/\*/g, ".*"))
+        .join("|") +
+      ")$",
+    "i",
+  );
+  return (hostmask) => Boolean(hostmask) && regex.test(hostmask!);
 }
 
 /** Wrap the steered message payload in steering instructions. */
@@ -8,7 +8,7 @@ import { appendAttachmentBlock, normalizeName, nowMonotonicSeconds, requireNonEm
 import type { MuaddibRuntime } from "../../runtime.js";
 import { RoomMessageHandler } from "../command/message-handler.js";
 import { InFlightTaskSet } from "../in-flight-task-set.js";
-import { type RoomMessage, buildArc, matchPlatformAllowlist } from "../message.js";
+import { type RoomMessage, buildArc, type AllowlistMatcher, compilePlatformAllowlist } from "../message.js";
 import type { RoomGateway } from "../room-gateway.js";
 import {
   sendWithRetryResult,
@@ -146,6 +146,9 @@ export interface SlackRoomMonitorOptions {
 export class SlackRoomMonitor {
   private readonly logger: Logger;
   private readonly logWriter?: RuntimeLogWriter;
+  private readonly ignoreUsersLower: ReadonlySet<string>;
+  /** Undefined when the room has no userAllowlist (trust is then left unset). */
+  private readonly allowlistMatcher?: AllowlistMatcher;
 
   static async fromRuntime(
     runtime: MuaddibRuntime,
@@ -252,6 +255,9 @@ export class SlackRoomMonitor {
   constructor(private readonly options: SlackRoomMonitorOptions) {
     this.logger = options.logger ?? CONSOLE_LOGGER;
     this.logWriter = options.logWriter;
+    this.ignoreUsersLower = new Set((options.ignoreUsers ?? []).map((u) => u.toLowerCase()));
+    const userAllowlist = options.roomConfig.userAllowlist;
+    this.allowlistMatcher = userAllowlist ? compilePlatformAllowlist(userAllowlist) : undefined;
   }
 
   async run(): Promise<void> {
@@ -353,8 +359,7 @@ export class SlackRoomMonitor {
       return;
     }
 
-    const ignoreUsers = this.options.ignoreUsers ?? [];
-    if (ignoreUsers.some((u) => u.toLowerCase() === event.username.toLowerCase())) {
+    if (this.ignoreUsersLower.has(event.username.toLowerCase())) {
       return;
     }
 
@@ -373,10 +378,9 @@ export class SlackRoomMonitor {
       return;
     }
 
-    const userAllowlist = this.options.roomConfig.userAllowlist;
-    const trusted = userAllowlist
-      ? matchPlatformAllowlist(event.userId ? `${normalizeName(event.username)}_${event.userId}` : undefined, userAllowlist)
-      : undefined;
+    const trusted = this.allowlistMatcher?.(
+      event.userId ? `${normalizeName(event.username)}_${event.userId}` : undefined,
+    );
 
     const serverTag = `slack:${event.workspaceName ?? event.workspaceId}`;
     const channelName = resolveSlackChannelName(event);
@@ -1,11 +1,22 @@
+/** Compact consumed slots once at least this many have accumulated at the front. */
+const COMPACT_THRESHOLD = 1024;
+
 export class AsyncQueue<T> {
-  private readonly items: T[] = [];
-  private readonly waiters: Array<(value: T) => void> = [];
+  // Consumed from `head` rather than with Array#shift(), which copies the
+  // remaining items on every call and turns bursty inbound traffic quadratic.
+  private items: Array<T | undefined> = [];
+  private head = 0;
+  private waiters: Array<(value: T) => void> = [];
 
   /** Discard all queued items and cancel pending waiters (resolving them with the given sentinel). */
   drain(sentinel: T): void {
-    this.items.length = 0;
-    for (const waiter of this.waiters.splice(0)) {
+    this.items = [];
+    this.head = 0;
+    // Swap the waiter list out rather than copying it; a waiter that re-waits
+    // lands on the fresh list.
+    const waiters = this.waiters;
+    this.waiters = [];
+    for (const waiter of waiters) {
       waiter(sentinel);
     }
   }
@@ -20,12 +31,27 @@ export class AsyncQueue<T> {
   }
 
   async shift(): Promise<T> {
-    if (this.items.length > 0) {
-      return this.items.shift() as T;
+    if (this.head < this.items.length) {
+      return this.take();
     }
 
     return await new Promise<T>((resolve) => {
       this.waiters.push(resolve);
     });
   }
+
+  private take(): T {
+    const item = this.items[this.head] as T;
+    this.items[this.head] = undefined;
+    this.head += 1;
+
+    if (this.head === this.items.length) {
+      this.items = [];
+      this.head = 0;
+    } else if (this.head >= COMPACT_THRESHOLD && this.head * 2 >= this.items.length) {
+      this.items = this.items.slice(this.head);
+      this.head = 0;
+    }
+    return item;
+  }
 }
@@ -71,6 +71,9 @@ export type DeepMergeHook = (key: string, baseVal: unknown, overrideVal: unknown
  * Recursive deep merge. Plain objects are merged recursively;
  * arrays and primitives in `overrides` replace the base value.
  * An optional `hook` can override merge behavior for specific keys.
+ *
+ * Single pass over `overrides`: only subtrees present on both sides are
+ * copied, everything else is shared by reference with its source.
  */
 export function deepMerge(
   base: Record<string, unknown>,
@@ -78,7 +81,8 @@ export function deepMerge(
   hook?: DeepMergeHook,
 ): Record<string, unknown> {
   const result = { ...base };
-  for (const [key, value] of Object.entries(overrides)) {
+  for (const key of Object.keys(overrides)) {
+    const value = overrides[key];
     const baseValue = result[key];
     if (hook) {
       const hooked = hook(key, baseValue, value);
@@ -106,17 +110,26 @@ export function normalizeName(name: string): string {
   return name.trim().split(/\s+/u).join("_");
 }
 
+const UTC_MINUTE_FORMAT = new Intl.DateTimeFormat("sv-SE", {
+  year: "numeric", month: "2-digit", day: "2-digit",
+  hour: "2-digit", minute: "2-digit", hour12: false,
+  timeZone: "UTC",
+});
+let lastUtcMinute = NaN;
+let lastUtcTimeStr = "";
+
 /**
  * Format a Date (default: now) as "YYYY-MM-DD HH:MM" in UTC.
  * The last 5 characters give "HH:MM" for compact timestamps.
  */
 export function formatUtcTime(date = new Date()): string {
-  const fmt = new Intl.DateTimeFormat("sv-SE", {
-    year: "numeric", month: "2-digit", day: "2-digit",
-    hour: "2-digit", minute: "2-digit", hour12: false,
-    timeZone: "UTC",
-  });
-  return fmt.format(date);
+  // Minute resolution: reuse the last string until the minute rolls over.
+  const minute = Math.floor(date.getTime() / 60_000);
+  if (minute !== lastUtcMinute) {
+    lastUtcTimeStr = UTC_MINUTE_FORMAT.format(date);
+    lastUtcMinute = minute;
+  }
+  return lastUtcTimeStr;
 }
 
 /** Current wall-clock time in fractional seconds (for debounce comparisons). */
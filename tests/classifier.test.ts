@@ -196,6 +196,24 @@ describe("createModeClassifier", () => {
     );
   });
 
+  it("picks the most frequent whole-word label from a verbose response", async () => {
+    const modelAdapter = {
+      completeSimple: vi.fn(async () => ({
+        role: "assistant",
+        content: [{ type: "text", text: "Not EASY_SERIOUSLY; sarcastic it is. Sarcastic, or maybe easy_serious." }],
+        ...createStubAssistantFields(),
+        timestamp: Date.now(),
+      })),
+    } as any;
+
+    const classifier = createModeClassifier(commandConfig as any, {
+      modelAdapter,
+    });
+
+    const label = await classifier([userMsg("<nick> tell joke")]);
+    expect(label).toBe("SARCASTIC");
+  });
+
   it("falls back when completion fails and logs error severity", async () => {
     const logger = {
       debug: vi.fn(),
@@ -61,4 +61,18 @@ describe("mergeRoomConfigs", () => {
     expect(merged.promptVars?.intro).toBe("AB");
     expect(merged.varlink?.socketPath).toBe("/tmp/irc.sock");
   });
+
+  it("memoizes merged room configs per room name", () => {
+    const config = MuaddibConfig.inMemory({
+      rooms: {
+        common: { command: { historySize: 20 } },
+        irc: { command: { historySize: 40 } },
+      },
+    });
+
+    const irc = config.getRoomConfig("irc");
+    expect(config.getRoomConfig("irc")).toBe(irc);
+    expect(config.getRoomConfig("discord")).not.toBe(irc);
+    expect(config.getRoomConfig("discord").command?.historySize).toBe(20);
+  });
 });
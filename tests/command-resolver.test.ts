@@ -41,7 +41,72 @@ const commandConfig = {
 } as const;
 
 describe("CommandResolver", () => {
-  it("parses prefix flags, mode token, model override, and query", () => {
+  const prefixResolver = new CommandResolver(
+    commandConfig as any,
+    async () => "EASY_SERIOUS",
+    "!h",
+    new Set(["!c"]),
+    (model) => String(model),
+  );
+
+  it.each([
+    {
+      desc: "flags, mode token, model override, and query",
+      input: "!c !s @openai:gpt-4o explain it",
+      expected: { noContext: true, modeToken: "!s", modelOverride: "openai:gpt-4o", queryText: "explain it", error: null },
+    },
+    {
+      desc: "bare help token",
+      input: "!h",
+      expected: { noContext: false, modeToken: "!h", modelOverride: null, queryText: "", error: null },
+    },
+    {
+      desc: "first model override wins",
+      input: "@a:one @b:two hi",
+      expected: { noContext: false, modeToken: null, modelOverride: "a:one", queryText: "hi", error: null },
+    },
+    {
+      desc: "lone @ is query text",
+      input: "@ hi",
+      expected: { noContext: false, modeToken: null, modelOverride: null, queryText: "@ hi", error: null },
+    },
+    {
+      desc: "builtin command keeps the rest as arguments",
+      input: "!setkey abc !s",
+      expected: { noContext: false, modeToken: "!setkey", modelOverride: null, queryText: "abc !s", error: null },
+    },
+    {
+      desc: "query words that name Object properties are not mode tokens",
+      input: "!s constructor toString",
+      expected: { noContext: false, modeToken: "!s", modelOverride: null, queryText: "constructor toString", error: null },
+    },
+    {
+      desc: "unknown command token",
+      input: "!zzz hello",
+      expected: {
+        noContext: false,
+        modeToken: null,
+        modelOverride: null,
+        queryText: "!zzz hello",
+        error: "Unknown command '!zzz'. Use !h for help.",
+      },
+    },
+    {
+      desc: "second mode token",
+      input: "!s !d hello",
+      expected: {
+        noContext: false,
+        modeToken: "!s",
+        modelOverride: null,
+        queryText: "!d hello",
+        error: "Only one mode command allowed.",
+      },
+    },
+  ])("parsePrefix: $desc", ({ input, expected }) => {
+    expect(prefixResolver.parsePrefix(input)).toEqual(expected);
+  });
+
+  it("memoizes prefix parses by message content and keeps the query's own whitespace", () => {
     const resolver = new CommandResolver(
       commandConfig as any,
       async () => "EASY_SERIOUS",
@@ -50,16 +115,23 @@ describe("CommandResolver", () => {
       (model) => String(model),
     );
 
-    const parsed = resolver.parsePrefix("!c !s @openai:gpt-4o explain it");
-
-    expect(parsed.noContext).toBe(true);
+    const parsed = resolver.parsePrefix("  !s   explain\t it  ");
     expect(parsed.modeToken).toBe("!s");
-    expect(parsed.modelOverride).toBe("openai:gpt-4o");
-    expect(parsed.queryText).toBe("explain it");
-    expect(parsed.error).toBeNull();
+    expect(parsed.queryText).toBe("explain\t it");
+    expect(resolver.parsePrefix("  !s   explain\t it  ")).toBe(parsed);
+    expect(resolver.parsePrefix("!s fix this:\n  indented();").queryText).toBe("fix this:\n  indented();");
+
+    expect(resolver.parsePrefix("  plain  text !s ")).toEqual({
+      noContext: false,
+      modeToken: null,
+      modelOverride: null,
+      queryText: "plain  text !s",
+      error: null,
+    });
+    expect(resolver.parsePrefix("!s").queryText).toBe("");
   });
 
-  it("returns parse error for unknown command token", () => {
+  it("never caches builtin-command parses, so !setkey secrets are not retained", () => {
     const resolver = new CommandResolver(
       commandConfig as any,
       async () => "EASY_SERIOUS",
@@ -68,8 +140,10 @@ describe("CommandResolver", () => {
       (model) => String(model),
     );
 
-    const parsed = resolver.parsePrefix("!zzz hello");
-    expect(parsed.error).toContain("Unknown command");
+    const parsed = resolver.parsePrefix("!setkey openrouter sk-or-secret");
+    expect(parsed.modeToken).toBe("!setkey");
+    expect(parsed.queryText).toBe("openrouter sk-or-secret");
+    expect((resolver as any).parsedPrefixCache.size).toBe(0);
   });
 
   it("resolves builtin balance command without normal mode resolution", async () => {
@@ -155,6 +229,44 @@ describe("CommandResolver", () => {
     expect(resolved.selectedAutomatically).toBe(true);
   });
 
+  it("resolves mode-key channel policies to the default trigger and reports unknown policies", async () => {
+    const resolver = new CommandResolver(
+      {
+        ...commandConfig,
+        channelModes: {
+          "libera##modekey": "sarcastic",
+          "libera##bogus": "nonsense",
+          "libera##missing": "classifier:nope",
+        },
+      } as any,
+      async () => "EASY_SERIOUS",
+      "!h",
+      new Set(["!c"]),
+      (model) => String(model),
+    );
+    const resolveIn = (channelName: string) => resolver.resolve({
+      message: {
+        serverTag: "libera",
+        channelName,
+        arc: `libera#${channelName}`,
+        nick: "user",
+        mynick: "bot",
+        content: "hello",
+      },
+      context: [],
+      defaultSize: 40,
+    });
+
+    const modeKey = await resolveIn("#modekey");
+    expect(modeKey.selectedTrigger).toBe("!d");
+    expect(modeKey.modeKey).toBe("sarcastic");
+
+    expect((await resolveIn("#bogus")).error).toBe("Unknown channel mode policy 'nonsense'");
+    expect((await resolveIn("#missing")).error).toBe(
+      "Unknown channel mode policy 'classifier:nope': mode 'nope' missing",
+    );
+  });
+
   it("buildHelpMessage groups triggers by effective model, splitting trigger-level model overrides", () => {
     const configWithModelOverride = {
       ...commandConfig,
@@ -203,6 +315,24 @@ describe("CommandResolver", () => {
     expect(help).not.toMatch(/!s = serious.*!a = serious/);
   });
 
+  it("buildHelpMessage describes each channel's default mode over a shared modes section", () => {
+    const resolver = new CommandResolver(
+      commandConfig as any,
+      async () => "EASY_SERIOUS",
+      "!h",
+      new Set(["!c"]),
+      (model) => String(model),
+    );
+
+    const general = resolver.buildHelpMessage("libera", "#general");
+    const sarcasm = resolver.buildHelpMessage("libera", "#sarcasm");
+
+    expect(general).toMatch(/^default is automatic mode constrained to serious; modes: /);
+    expect(sarcasm).toMatch(/^default is forced trigger !d \(sarcastic\); modes: /);
+    expect(general.split("; modes: ")[1]).toBe(sarcasm.split("; modes: ")[1]);
+    expect(resolver.buildHelpMessage("libera", "#other")).toBe(general);
+  });
+
   it("supports steering bypass detection for non-steering mode", () => {
     const resolver = new CommandResolver(
       commandConfig as any,
@@ -352,6 +482,31 @@ describe("CommandResolver", () => {
   });
 });
 
+describe("CommandResolver channel lookups", () => {
+  it("normalizes platform server tags into channel keys and resolves channel modes", () => {
+    const channelModes: Record<string, string> = { "libera##sarcasm": "!d" };
+    const resolver = new CommandResolver(
+      { ...commandConfig, channelModes } as any,
+      async () => "EASY_SERIOUS",
+      "!h",
+      new Set(["!c"]),
+      (model) => String(model),
+    );
+
+    expect(CommandResolver.channelKey("discord:guild", "general")).toBe("guild#general");
+    expect(CommandResolver.channelKey("slack:ws", "dev/ops")).toBe("ws#dev%2Fops");
+
+    expect(resolver.getChannelMode("libera", "#sarcasm")).toBe("!d");
+    expect(resolver.getChannelMode("libera", "#general")).toBe("classifier:serious");
+
+    // Config is immutable at runtime, so later lookups are served from the memo.
+    channelModes["libera##sarcasm"] = "!s";
+    channelModes["libera##general"] = "!d";
+    expect(resolver.getChannelMode("libera", "#sarcasm")).toBe("!d");
+    expect(resolver.getChannelMode("libera", "#general")).toBe("classifier:serious");
+  });
+});
+
 describe("CommandResolver runtimeForTrigger toolsOverrides", () => {
   it("returns null toolsOverrides when trigger has no tools override", () => {
     const resolver = new CommandResolver(
@@ -395,6 +550,23 @@ describe("CommandResolver runtimeForTrigger toolsOverrides", () => {
     const { runtime: aRuntime } = resolver.runtimeForTrigger("!a");
     expect(aRuntime.toolsOverrides).toBeNull();
   });
+
+  it("precomputes runtime settings per trigger and rejects unknown triggers", () => {
+    const resolver = new CommandResolver(
+      commandConfig as any,
+      async () => "EASY_SERIOUS",
+      "!h",
+      new Set(["!c"]),
+      (model) => String(model),
+    );
+
+    const first = resolver.runtimeForTrigger("!a");
+    expect(first.modeKey).toBe("serious");
+    expect(first.runtime.reasoningEffort).toBe("medium");
+    expect(first.runtime.historySize).toBe(40);
+    expect(resolver.runtimeForTrigger("!a")).toBe(first);
+    expect(() => resolver.runtimeForTrigger("!nope")).toThrow("Unknown trigger '!nope'");
+  });
 });
 
 describe("modelStrCore", () => {
@@ -413,4 +585,10 @@ describe("modelStrCore", () => {
   it("handles bare model name", () => {
     expect(modelStrCore("claude-opus-4-6")).toBe("claude-opus-4-6");
   });
+
+  it("returns consistent results for repeated (memoized) lookups", () => {
+    expect(modelStrCore("anthropic:claude-opus-4-6")).toBe("claude-opus-4-6");
+    expect(modelStrCore("anthropic:claude-opus-4-6")).toBe("claude-opus-4-6");
+    expect(modelStrCore(undefined)).toBe("undefined");
+  });
 });
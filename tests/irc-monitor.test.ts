@@ -10,7 +10,7 @@ import type { ChatHistoryStore } from "../src/history/chat-history-store.js";
 import { RoomMessageHandler } from "../src/rooms/command/message-handler.js";
 import { IrcRoomMonitor } from "../src/rooms/irc/monitor.js";
 import { VarlinkSender } from "../src/rooms/irc/varlink.js";
-import { buildArc } from "../src/rooms/message.js";
+import { buildArc, compileIrcAllowlist } from "../src/rooms/message.js";
 import { RoomGateway } from "../src/rooms/room-gateway.js";
 import type { MuaddibRuntime } from "../src/runtime.js";
 import { FakeEventsClient, FakeSender, baseCommandConfig } from "./e2e/helpers.js";
@@ -918,6 +918,30 @@ describe("IrcRoomMonitor", () => {
     await history.close();
   });
 
+  it("compiles IRC allowlists into anchored, case-insensitive glob matchers", () => {
+    const matches = compileIrcAllowlist(["*!*@unaffiliated/pasky", "nick!~user@host.example"]);
+
+    expect(matches("pasky!~pasky@unaffiliated/pasky")).toBe(true);
+    expect(matches("PASKY!~pasky@Unaffiliated/Pasky")).toBe(true);
+    expect(matches("NICK!~USER@HOST.EXAMPLE")).toBe(true);
+    // Masks match the whole hostmask, never just a prefix or suffix of it.
+    expect(matches("pasky!~pasky@unaffiliated/pasky.evil.com")).toBe(false);
+    expect(matches("evil!nick!~user@host.example")).toBe(false);
+    expect(matches(undefined)).toBe(false);
+    expect(compileIrcAllowlist([])("pasky!~pasky@unaffiliated/pasky")).toBe(false);
+  });
+
+  it("matches IRC allowlist metacharacters literally", () => {
+    const matches = compileIrcAllowlist(["a.b|c[d!*@host", "?oops"]);
+
+    expect(matches("a.b|c[d!~x@host")).toBe(true);
+    expect(matches("axb|c[d!~x@host")).toBe(false);
+    expect(matches("a.b")).toBe(false);
+    expect(matches("c[d!~x@host")).toBe(false);
+    expect(matches("?oops")).toBe(true);
+    expect(matches("oops")).toBe(false);
+  });
+
   it("processes IRC events concurrently without waiting for previous handler completion", async () => {
     const history = createTempHistoryStore(20);
     await history.initialize();
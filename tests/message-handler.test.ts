@@ -232,6 +232,32 @@ function makeRunner(
   });
 }
 
+/**
+ * Returns a runner whose prompt registers a steerable mock agent, then blocks
+ * until releaseFirst resolves so follow-ups can be steered into the session.
+ */
+function makeBlockingSteerableRunner(text = "done") {
+  const firstStarted = createDeferred<void>();
+  const releaseFirst = createDeferred<void>();
+  const steerCalls: any[] = [];
+  const { agent } = makeMockAgent(steerCalls);
+  let promptCount = 0;
+
+  const runnerFactory: CommandRunnerFactory = (input) => ({
+    prompt: async () => {
+      promptCount += 1;
+      input.onAgentCreated?.(agent as any);
+      firstStarted.resolve();
+      await releaseFirst.promise;
+      const result = makeRunnerResult(text);
+      await input.onResponse(result.text);
+      return result;
+    },
+  });
+
+  return { runnerFactory, firstStarted, releaseFirst, steerCalls, promptCalls: () => promptCount };
+}
+
 function makeUsageRecord(inputTokens: number, outputTokens: number, totalCost: number) {
   return {
     input: inputTokens,
@@ -380,6 +406,159 @@ describe("RoomMessageHandler", () => {
     await history.close();
   });
 
+  it("reuses the rendered system prompt across commands while refreshing current_time", async () => {
+    const history = createTempHistoryStore(40);
+    await history.initialize();
+
+    const systemPrompts: string[] = [];
+    const handler = createHandler({
+      roomConfig: roomConfig as any,
+      history,
+      runnerFactory: (input) => {
+        systemPrompts.push(input.systemPrompt);
+        return {
+          prompt: async () => makeRunnerResult("done"),
+        };
+      },
+    });
+
+    vi.useFakeTimers({ toFake: ["Date"] });
+    try {
+      vi.setSystemTime(new Date("2025-03-01T10:15:00Z"));
+      await handler.handleIncomingMessage(makeMessage("!s first", { isDirect: true }));
+      vi.setSystemTime(new Date("2025-03-01T10:16:00Z"));
+      await handler.handleIncomingMessage(makeMessage("!s second", { isDirect: true }));
+    } finally {
+      vi.useRealTimers();
+    }
+
+    expect(systemPrompts).toEqual([
+      "You are muaddib. Time=2025-03-01 10:15 UTC.",
+      "You are muaddib. Time=2025-03-01 10:16 UTC.",
+    ]);
+
+    await history.close();
+  });
+
+  it("substitutes trigger-model and prompt variables in one pass, leaving unknown placeholders", async () => {
+    const history = createTempHistoryStore(40);
+    await history.initialize();
+
+    const systemPrompts: string[] = [];
+    const handler = createHandler({
+      roomConfig: {
+        ...roomConfig,
+        command: {
+          ...roomConfig.command,
+          modes: {
+            ...roomConfig.command.modes,
+            serious: {
+              ...roomConfig.command.modes.serious,
+              prompt: "{mynick} on {current_model} via {current_trigger}; !d uses {!d_model}. {!x_model} {nope}{output}",
+            },
+            sarcastic: {
+              ...roomConfig.command.modes.sarcastic,
+              model: "anthropic:claude-3-haiku",
+            },
+          },
+        },
+      } as any,
+      history,
+      runnerFactory: (input) => {
+        systemPrompts.push(input.systemPrompt);
+        return {
+          prompt: async () => makeRunnerResult("done"),
+        };
+      },
+    });
+
+    await handler.handleIncomingMessage(makeMessage("!s hi", { isDirect: true }));
+
+    expect(systemPrompts).toEqual([
+      "muaddib on gpt-4o-mini via !s; !d uses claude-3-haiku. {!x_model} {nope}",
+    ]);
+
+    await history.close();
+  });
+
+  it("keeps delivering while earlier responses persist, preserving history order", async () => {
+    const history = createTempHistoryStore(40);
+    await history.initialize();
+
+    const releaseFirst = createDeferred<void>();
+    const origAddMessage = history.addMessage.bind(history);
+    vi.spyOn(history, "addMessage").mockImplementation(async (...args) => {
+      const [msg] = args;
+      if ((msg as RoomMessage).content === "first") {
+        await releaseFirst.promise;
+      }
+      return origAddMessage(...(args as Parameters<typeof history.addMessage>));
+    });
+
+    const sent: string[] = [];
+    const handler = createHandler({
+      roomConfig: roomConfig as any,
+      history,
+      runnerFactory: (input) => ({
+        prompt: async () => {
+          await input.onResponse("first");
+          // Would deadlock if delivery waited on the blocked history write.
+          await input.onResponse("second");
+          releaseFirst.resolve();
+          return makeRunnerResult("second");
+        },
+      }),
+    });
+
+    await handler.handleIncomingMessage(makeMessage("!s go", { isDirect: true }), {
+      sendResponse: async (text) => {
+        sent.push(text);
+      },
+    });
+
+    expect(sent).toEqual(["first", "second"]);
+    const rows = await history.getFullHistory("libera##test");
+    expect(rows.map((row) => row.message)).toEqual([
+      expect.stringContaining("!s go"),
+      "<muaddib> first",
+      "<muaddib> second",
+    ]);
+
+    await history.close();
+  });
+
+  it("fails the command when a bot reply cannot be written to history", async () => {
+    const history = createTempHistoryStore(40);
+    await history.initialize();
+
+    const origAddMessage = history.addMessage.bind(history);
+    vi.spyOn(history, "addMessage").mockImplementation(async (...args) => {
+      if ((args[0] as RoomMessage).nick === "muaddib") {
+        throw new Error("disk full");
+      }
+      return origAddMessage(...(args as Parameters<typeof history.addMessage>));
+    });
+
+    const sent: string[] = [];
+    const handler = createHandler({
+      roomConfig: roomConfig as any,
+      history,
+      runnerFactory: makeRunner("reply"),
+    });
+
+    await expect(
+      handler.handleIncomingMessage(makeMessage("!s go", { isDirect: true }), {
+        sendResponse: async (text) => {
+          sent.push(text);
+        },
+      }),
+    ).rejects.toThrow("disk full");
+    // The reply still reached the room before the write failed.
+    expect(sent).toEqual(["reply"]);
+
+    await history.close();
+  });
+
   it("strips echoed IRC context prefixes from generated response text", async () => {
     const history = createTempHistoryStore(40);
     await history.initialize();
@@ -566,7 +745,7 @@ describe("RoomMessageHandler", () => {
       classifyMode: async () => "EASY_SERIOUS",
       logger,
       rateLimiter: {
-        checkLimit: vi.fn().mockReturnValue(false),
+        checkLimit: () => false,
       },
       runnerFactory: () => ({
         prompt: async () => makeRunnerResult("unused"),
@@ -946,28 +1125,13 @@ describe("RoomMessageHandler", () => {
       threadId: "thread-1",
     };
 
-    const firstStarted = createDeferred<void>();
-    const releaseFirst = createDeferred<void>();
-
-    let promptCallCount = 0;
-    const steerCalls: any[] = [];
-    const { agent: mockAgent } = makeMockAgent(steerCalls);
+    const { runnerFactory, firstStarted, releaseFirst, steerCalls, promptCalls } = makeBlockingSteerableRunner();
 
     const handler = createHandler({
       roomConfig: roomConfig as any,
       history,
       classifyMode: async () => "EASY_SERIOUS",
-      runnerFactory: (input) => ({
-        prompt: async (_prompt) => {
-          promptCallCount += 1;
-          input.onAgentCreated?.(mockAgent as any);
-          firstStarted.resolve();
-          await releaseFirst.promise;
-          const result = makeRunnerResult("done");
-          await input.onResponse(result.text);
-          return result;
-        },
-      }),
+      runnerFactory,
     });
 
     const sent: string[] = [];
@@ -993,7 +1157,7 @@ describe("RoomMessageHandler", () => {
     await Promise.all([resultPromise, followupPromise]);
 
     expect(sent[0]).toBe("done");
-    expect(promptCallCount).toBe(1);
+    expect(promptCalls()).toBe(1);
     expect(steerCalls).toHaveLength(1);
     expect(steerCalls[0].content[0].text).toContain("second line");
     // Direct thread follow-ups are user messages, not background noise —
@@ -1012,26 +1176,13 @@ describe("RoomMessageHandler", () => {
       threadId: "thread-ec",
     };
 
-    const firstStarted = createDeferred<void>();
-    const releaseFirst = createDeferred<void>();
-
-    const steerCalls: any[] = [];
-    const { agent: mockAgent } = makeMockAgent(steerCalls);
+    const { runnerFactory, firstStarted, releaseFirst } = makeBlockingSteerableRunner();
 
     const handler = createHandler({
       roomConfig: roomConfig as any,
       history,
       classifyMode: async () => "EASY_SERIOUS",
-      runnerFactory: (input) => ({
-        prompt: async (_prompt) => {
-          input.onAgentCreated?.(mockAgent as any);
-          firstStarted.resolve();
-          await releaseFirst.promise;
-          const result = makeRunnerResult("done");
-          await input.onResponse(result.text);
-          return result;
-        },
-      }),
+      runnerFactory,
     });
 
     let sessionOnSteeredCalled = false;
@@ -1064,6 +1215,49 @@ describe("RoomMessageHandler", () => {
     await history.close();
   });
 
+  it("tracks active command sessions per arc through the buffering-to-live steer swap", async () => {
+    const history = createTempHistoryStore(40);
+    await history.initialize();
+
+    const { runnerFactory, firstStarted, releaseFirst } = makeBlockingSteerableRunner();
+
+    const handler = createHandler({
+      roomConfig: roomConfig as any,
+      history,
+      classifyMode: async () => "EASY_SERIOUS",
+      runnerFactory,
+    });
+    const hasActiveSession = (arc: string): boolean => (handler as any).hasActiveCommandSessionForChannel(arc);
+    const arcA = buildArc("libera", "#test");
+    const arcB = buildArc("libera", "#other");
+
+    expect(hasActiveSession(arcA)).toBe(false);
+
+    const t1 = handler.handleIncomingMessage(makeMessage("!s first", { isDirect: true }), {
+      sendResponse: async () => {},
+    });
+
+    // The runner has created its agent, so the session is past the buffering → live swap.
+    await firstStarted.promise;
+    expect(hasActiveSession(arcA)).toBe(true);
+    expect(hasActiveSession(arcB)).toBe(false);
+
+    releaseFirst.resolve();
+    await t1;
+
+    expect(hasActiveSession(arcA)).toBe(false);
+    expect(hasActiveSession(arcB)).toBe(false);
+
+    // Repeated sessions in the arc do not leave a stale count behind.
+    const t2 = handler.handleIncomingMessage(makeMessage("!s again", { isDirect: true }), {
+      sendResponse: async () => {},
+    });
+    await t2;
+    expect(hasActiveSession(arcA)).toBe(false);
+
+    await history.close();
+  });
+
   it("intercepts !approve and resumes pending network access in the same thread only", async () => {
     const history = createTempHistoryStore(40);
     await history.initialize();
@@ -1326,26 +1520,13 @@ describe("RoomMessageHandler", () => {
     const history = createTempHistoryStore(40);
     await history.initialize();
 
-    const firstStarted = createDeferred<void>();
-    const releaseFirst = createDeferred<void>();
-
-    const steerCalls: any[] = [];
-    const { agent: mockAgent } = makeMockAgent(steerCalls);
+    const { runnerFactory, firstStarted, releaseFirst, steerCalls } = makeBlockingSteerableRunner();
 
     const handler = createHandler({
       roomConfig: roomConfig as any,
       history,
       classifyMode: async () => "EASY_SERIOUS",
-      runnerFactory: (input) => ({
-        prompt: async () => {
-          input.onAgentCreated?.(mockAgent as any);
-          firstStarted.resolve();
-          await releaseFirst.promise;
-          const result = makeRunnerResult("done");
-          await input.onResponse(result.text);
-          return result;
-        },
-      }),
+      runnerFactory,
     });
 
     const sent: string[] = [];
@@ -2013,7 +2194,7 @@ describe("RoomMessageHandler", () => {
       history,
       classifyMode: async () => "EASY_SERIOUS",
       rateLimiter: {
-        checkLimit: vi.fn().mockReturnValue(false),
+        checkLimit: () => false,
       },
       runnerFactory: () => {
         throw new Error("runner should not be called when rate-limited");
@@ -2085,7 +2266,7 @@ describe("RoomMessageHandler", () => {
       classifyMode: async () => "EASY_SERIOUS",
       autoChronicler: rateLimitedAutoChronicler,
       rateLimiter: {
-        checkLimit: vi.fn().mockReturnValue(false),
+        checkLimit: () => false,
       },
       runnerFactory: () => {
         throw new Error("runner should not run when rate-limited");
@@ -2383,6 +2564,50 @@ describe("RoomMessageHandler", () => {
     await history.close();
   });
 
+  it("cuts oversized multi-byte responses on a character boundary", async () => {
+    const history = createTempHistoryStore(40);
+    await history.initialize();
+
+    const incoming = makeMessage("!s make it long");
+    const artifactsPath = await mkdtemp(join(tmpdir(), "muaddib-artifacts-"));
+    const sent: string[] = [];
+
+    const handler = createHandler({
+      roomConfig: {
+        ...roomConfig,
+        command: {
+          ...roomConfig.command,
+          // Odd byte budget lands mid-character for two-byte "ž".
+          responseMaxBytes: 121,
+        },
+      } as any,
+      history,
+      classifyMode: async () => "EASY_SERIOUS",
+      configData: {
+        agent: {
+          tools: {
+            artifacts: {
+              path: artifactsPath,
+              url: "https://example.com/artifacts/?",
+            },
+          },
+        },
+      },
+      runnerFactory: makeRunner("ž".repeat(200)),
+    });
+
+    incoming.isDirect = true;
+    await handler.handleIncomingMessage(incoming, {
+      sendResponse: async (text) => {
+        sent.push(text);
+      },
+    });
+
+    expect(sent[0]).toMatch(/^ž{60}\.\.\. full response: https:\/\/example\.com\/artifacts\/\?/);
+
+    await history.close();
+  });
+
   it("keeps original newlines in artifact body when IRC transport flattens outbound text", async () => {
     const history = createTempHistoryStore(40);
     await history.initialize();
@@ -2655,58 +2880,44 @@ describe("RoomMessageHandler", () => {
     await history.close();
   });
 
-  it("concurrent commands from same user steer into active session", async () => {
+  it.each([
+    { desc: "concurrent commands from same user steer into active session", threadId: undefined, nicks: ["alice", "alice"] },
+    { desc: "shares session across users in the same thread via steering", threadId: "thread-1", nicks: ["bob", "carol"] },
+  ])("$desc", async ({ threadId, nicks }) => {
     const history = createTempHistoryStore(40);
     await history.initialize();
 
-    const firstStarted = createDeferred<void>();
-    const releaseFirst = createDeferred<void>();
-
-    let runCount = 0;
-    const steerCalls: any[] = [];
-    const { agent: mockAgent } = makeMockAgent(steerCalls);
+    const { runnerFactory, firstStarted, releaseFirst, steerCalls, promptCalls } = makeBlockingSteerableRunner("first response");
 
     const handler = createHandler({
       roomConfig: roomConfig as any,
       history,
       classifyMode: async () => "EASY_SERIOUS",
-      runnerFactory: (input) => ({
-        prompt: async (_prompt) => {
-          runCount += 1;
-          input.onAgentCreated?.(mockAgent as any);
-          firstStarted.resolve();
-          await releaseFirst.promise;
-          const result = makeRunnerResult("first response");
-          await input.onResponse(result.text);
-          return result;
-        },
-      }),
+      runnerFactory,
     });
 
     const sent: string[] = [];
-    const t1 = handler.handleIncomingMessage(makeMessage("!s first", { isDirect: true }), {
+    const t1 = handler.handleIncomingMessage(makeMessage("!s first", { threadId, isDirect: true }), {
       sendResponse: async (text) => { sent.push(text); },
     });
 
     await firstStarted.promise;
 
-    const t2 = handler.handleIncomingMessage(makeMessage("!s second", { isDirect: true }), {
-      sendResponse: async () => {},
-    });
-    const t3 = handler.handleIncomingMessage(makeMessage("!s third", { isDirect: true }), {
-      sendResponse: async () => {},
-    });
+    const followups = ["second", "third"].map((word, i) =>
+      handler.handleIncomingMessage(makeMessage(`!s ${word}`, { nick: nicks[i], threadId, isDirect: true }), {
+        sendResponse: async () => {},
+      }));
 
     releaseFirst.resolve();
 
-    await Promise.all([t1, t2, t3]);
+    await Promise.all([t1, ...followups]);
 
-    expect(runCount).toBe(1);
+    expect(promptCalls()).toBe(1);
     expect(sent[0]).toBe("first response");
     expect(steerCalls).toHaveLength(2);
     const steeredTexts = steerCalls.map((c: any) => c.content[0].text);
-    expect(steeredTexts.some((t: string) => t.includes("second"))).toBe(true);
-    expect(steeredTexts.some((t: string) => t.includes("third"))).toBe(true);
+    expect(steeredTexts).toContainEqual(expect.stringContaining(`<${nicks[0]}> !s second`));
+    expect(steeredTexts).toContainEqual(expect.stringContaining(`<${nicks[1]}> !s third`));
 
     await history.close();
   });
@@ -2769,88 +2980,18 @@ describe("RoomMessageHandler", () => {
     await history.close();
   });
 
-  it("shares session across users in the same thread via steering", async () => {
-    const history = createTempHistoryStore(40);
-    await history.initialize();
-
-    const firstStarted = createDeferred<void>();
-    const releaseFirst = createDeferred<void>();
-
-    const steerCalls: any[] = [];
-    const { agent: mockAgent } = makeMockAgent(steerCalls);
-
-    const handler = createHandler({
-      roomConfig: roomConfig as any,
-      history,
-      classifyMode: async () => "EASY_SERIOUS",
-      runnerFactory: (input) => ({
-        prompt: async () => {
-          input.onAgentCreated?.(mockAgent as any);
-          firstStarted.resolve();
-          await releaseFirst.promise;
-          const result = makeRunnerResult("first response");
-          await input.onResponse(result.text);
-          return result;
-        },
-      }),
-    });
-
-    const sent: string[] = [];
-    const t1 = handler.handleIncomingMessage(
-      { ...makeMessage("!s first"), threadId: "thread-1", isDirect: true },
-      { sendResponse: async (text) => { sent.push(text); } },
-    );
-
-    await firstStarted.promise;
-
-    const t2 = handler.handleIncomingMessage(
-      { ...makeMessage("!s second"), nick: "bob", threadId: "thread-1", isDirect: true },
-      { sendResponse: async () => {} },
-    );
-
-    const t3 = handler.handleIncomingMessage(
-      { ...makeMessage("!s third"), nick: "carol", threadId: "thread-1", isDirect: true },
-      { sendResponse: async () => {} },
-    );
-
-    releaseFirst.resolve();
-
-    await Promise.all([t1, t2, t3]);
-
-    expect(sent[0]).toBe("first response");
-    expect(steerCalls).toHaveLength(2);
-    const steeredTexts = steerCalls.map((c: any) => c.content[0].text);
-    expect(steeredTexts).toContainEqual(expect.stringContaining("bob"));
-    expect(steeredTexts).toContainEqual(expect.stringContaining("carol"));
-
-    await history.close();
-  });
-
   it("passives and commands arriving during active session all steer into the agent", async () => {
     const history = createTempHistoryStore(40);
     await history.initialize();
 
-    const firstStarted = createDeferred<void>();
-    const releaseFirst = createDeferred<void>();
-
-    const steerCalls: any[] = [];
-    const { agent: mockAgent } = makeMockAgent(steerCalls);
+    const { runnerFactory, firstStarted, releaseFirst, steerCalls } = makeBlockingSteerableRunner("first response");
     const sent: string[] = [];
 
     const handler = createHandler({
       roomConfig: roomConfig as any,
       history,
       classifyMode: async () => "EASY_SERIOUS",
-      runnerFactory: (input) => ({
-        prompt: async () => {
-          input.onAgentCreated?.(mockAgent as any);
-          firstStarted.resolve();
-          await releaseFirst.promise;
-          const result = makeRunnerResult("first response");
-          await input.onResponse(result.text);
-          return result;
-        },
-      }),
+      runnerFactory,
     });
 
     const t1 = handler.handleIncomingMessage(makeMessage("!s first", { isDirect: true }), {
@@ -2907,27 +3048,13 @@ describe("RoomMessageHandler", () => {
     const history = createTempHistoryStore(40);
     await history.initialize();
 
-    const firstStarted = createDeferred<void>();
-    const releaseFirst = createDeferred<void>();
-
-    // Mock agent with steer tracking
-    const steerCalls: any[] = [];
-    const { agent: mockAgent } = makeMockAgent(steerCalls);
+    const { runnerFactory, firstStarted, releaseFirst, steerCalls } = makeBlockingSteerableRunner();
 
     const handler = createHandler({
       roomConfig: roomConfig as any,
       history,
       classifyMode: async () => "EASY_SERIOUS",
-      runnerFactory: (input) => ({
-        prompt: async () => {
-          input.onAgentCreated?.(mockAgent as any);
-          firstStarted.resolve();
-          await releaseFirst.promise;
-          const result = makeRunnerResult("done");
-          await input.onResponse(result.text);
-          return result;
-        },
-      }),
+      runnerFactory,
     });
 
     const t1 = handler.handleIncomingMessage(makeMessage("!s first", { isDirect: true }), {
@@ -2958,26 +3085,13 @@ describe("RoomMessageHandler", () => {
     const history = createTempHistoryStore(40);
     await history.initialize();
 
-    const firstStarted = createDeferred<void>();
-    const releaseFirst = createDeferred<void>();
-
-    const steerCalls: any[] = [];
-    const { agent: mockAgent } = makeMockAgent(steerCalls);
+    const { runnerFactory, firstStarted, releaseFirst, steerCalls } = makeBlockingSteerableRunner();
 
     const handler = createHandler({
       roomConfig: roomConfig as any,
       history,
       classifyMode: async () => "EASY_SERIOUS",
-      runnerFactory: (input) => ({
-        prompt: async () => {
-          input.onAgentCreated?.(mockAgent as any);
-          firstStarted.resolve();
-          await releaseFirst.promise;
-          const result = makeRunnerResult("done");
-          await input.onResponse(result.text);
-          return result;
-        },
-      }),
+      runnerFactory,
     });
 
     const t1 = handler.handleIncomingMessage(makeMessage("!s first", { isDirect: true }), {
@@ -3988,29 +4102,14 @@ describe("RoomMessageHandler", () => {
     const history = createTempHistoryStore(40);
     await history.initialize();
 
-    const firstStarted = createDeferred<void>();
-    const releaseFirst = createDeferred<void>();
-
-    let runCount = 0;
-    const steerCalls: any[] = [];
-    const { agent: mockAgent } = makeMockAgent(steerCalls);
+    const { runnerFactory, firstStarted, releaseFirst, steerCalls, promptCalls } = makeBlockingSteerableRunner("reply 1");
     const sent: string[] = [];
 
     const handler = createHandler({
       roomConfig: roomConfig as any,
       history,
       classifyMode: async () => "EASY_SERIOUS",
-      runnerFactory: (input) => ({
-        prompt: async () => {
-          runCount += 1;
-          input.onAgentCreated?.(mockAgent as any);
-          firstStarted.resolve();
-          await releaseFirst.promise;
-          const result = makeRunnerResult("reply 1");
-          await input.onResponse(result.text);
-          return result;
-        },
-      }),
+      runnerFactory,
     });
 
     const t1 = handler.handleIncomingMessage(makeMessage("!s first", { isDirect: true }), {
@@ -4029,7 +4128,7 @@ describe("RoomMessageHandler", () => {
     releaseFirst.resolve();
     await Promise.all([t1, t2, t3]);
 
-    expect(runCount).toBe(1);
+    expect(promptCalls()).toBe(1);
     expect(steerCalls).toHaveLength(2);
     expect(sent).toEqual(["reply 1"]);
 
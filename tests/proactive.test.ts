@@ -12,6 +12,15 @@ function userMsg(content: string): Message {
   return { role: "user", content, timestamp: 0 };
 }
 
+function scoreResponse(text: string): AssistantMessage {
+  return {
+    role: "assistant",
+    content: [{ type: "text", text }],
+    ...createStubAssistantFields(),
+    timestamp: Date.now(),
+  };
+}
+
 function assistantMsg(content: string): Message {
   return {
     role: "assistant",
@@ -92,4 +101,44 @@ describe("evaluateProactiveInterjection", () => {
     expect(completeSimple).toHaveBeenCalled();
     expect(result.shouldInterject).toBe(true);
   });
+
+  it("stops at the first rejecting validation model without calling the rest", async () => {
+    const config = {
+      ...baseConfig,
+      models: { ...baseConfig.models, validation: ["openai:cheap", "openai:expensive"] },
+    };
+    const completeSimple = vi.fn(async (_model: string) => scoreResponse("Off-topic: 2/10"));
+    const options = { ...baseOptions, modelAdapter: { completeSimple } as any };
+
+    const result = await evaluateProactiveInterjection(
+      config,
+      [userMsg("[14:30] <alice> lol")],
+      options,
+    );
+
+    expect(result.shouldInterject).toBe(false);
+    expect(result.reason).toBe("Rejected at validation step 1 (Score: 2)");
+    expect(completeSimple).toHaveBeenCalledTimes(1);
+    expect(completeSimple.mock.calls[0][0]).toBe("openai:cheap");
+  });
+
+  it("consults each validation model in order and decides on the last score", async () => {
+    const config = {
+      ...baseConfig,
+      models: { ...baseConfig.models, validation: ["openai:first", "openai:second"] },
+    };
+    const completeSimple = vi.fn(async (model: string) =>
+      scoreResponse(model === "openai:first" ? "Relevant: 9/10" : "Relevant: 8/10"));
+    const options = { ...baseOptions, modelAdapter: { completeSimple } as any };
+
+    const result = await evaluateProactiveInterjection(
+      config,
+      [userMsg("[14:30] <alice> how do I configure systemd?")],
+      options,
+    );
+
+    expect(completeSimple.mock.calls.map((call) => call[0])).toEqual(["openai:first", "openai:second"]);
+    expect(result.shouldInterject).toBe(true);
+    expect(result.reason).toBe("Interjection decision (Final Score: 8)");
+  });
 });
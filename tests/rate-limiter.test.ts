@@ -0,0 +1,35 @@
+import { describe, expect, it } from "vitest";
+
+import { RateLimiter } from "../src/rooms/command/rate-limiter.js";
+
+describe("RateLimiter", () => {
+  it("allows a burst up to the rate, then refills continuously", () => {
+    let now = 0;
+    const limiter = new RateLimiter(3, 30, () => now);
+
+    expect([limiter.checkLimit(), limiter.checkLimit(), limiter.checkLimit()]).toEqual([true, true, true]);
+    expect(limiter.checkLimit()).toBe(false);
+
+    // One token per 10 seconds.
+    now = 9;
+    expect(limiter.checkLimit()).toBe(false);
+    now = 10;
+    expect(limiter.checkLimit()).toBe(true);
+    expect(limiter.checkLimit()).toBe(false);
+  });
+
+  it("caps refill at the bucket capacity", () => {
+    let now = 0;
+    const limiter = new RateLimiter(2, 10, () => now);
+
+    now = 1_000;
+    expect([limiter.checkLimit(), limiter.checkLimit(), limiter.checkLimit()]).toEqual([true, true, false]);
+  });
+
+  it("never limits when the rate is disabled", () => {
+    const limiter = new RateLimiter(0, 10, () => 0);
+    for (let i = 0; i < 5; i++) {
+      expect(limiter.checkLimit()).toBe(true);
+    }
+  });
+});
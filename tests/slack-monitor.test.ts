@@ -1019,7 +1019,7 @@ describe("SlackRoomMonitor", () => {
     await history.close();
   });
 
-  it("ignores users from ignore list through shared command handler", async () => {
+  it("ignores users from ignore list case-insensitively through shared command handler", async () => {
     const history = createTempHistoryStore(20);
 
     let called = false;
@@ -1038,7 +1038,7 @@ describe("SlackRoomMonitor", () => {
     await monitor.processMessageEvent({
       workspaceId: "T123",
       channelId: "C123",
-      username: "alice",
+      username: "Alice",
       text: "hello",
       mynick: "muaddib",
     });
@@ -624,6 +624,43 @@ describe("ChatHistoryStore", () => {
     await store.close();
   });
 
+  it("logLlmCosts writes each batch of cost rows, in order, to its day's file", async () => {
+    const dir = makeTempDir();
+    const store = new ChatHistoryStore(dir);
+    await store.initialize();
+
+    vi.useFakeTimers({ toFake: ["Date"] });
+    try {
+      vi.setSystemTime(new Date("2025-03-01T23:59:59.000Z"));
+      await store.logLlmCosts(ARC, [
+        { run: "run-1", source: "agent", call: "agent_run", model: "openai:gpt-4o-mini", inTok: 10, outTok: 5, cost: 0.01 },
+        { run: "run-1", call: "classifier", model: "openai:gpt-4o-mini", cost: 0.002 },
+      ]);
+      vi.setSystemTime(new Date("2025-03-02T00:00:01.000Z"));
+      await store.logLlmCosts(ARC, [
+        { run: "run-2", call: "agent_run", model: "anthropic:claude", inTok: 3 },
+        { run: "run-2", call: "memory_update", model: "anthropic:claude", outTok: 7 },
+      ]);
+    } finally {
+      vi.useRealTimers();
+    }
+
+    const readDay = (date: string) =>
+      readFileSync(join(dir, ARC, "chat_history", `${date}.jsonl`), "utf-8").trim().split("\n").map((l) => JSON.parse(l));
+    const lateTs = "2025-03-01T23:59:59.000Z";
+    const earlyTs = "2025-03-02T00:00:01.000Z";
+    expect(readDay("2025-03-01")).toEqual([
+      { ts: lateTs, run: "run-1", source: "agent", call: "agent_run", model: "openai:gpt-4o-mini", inTok: 10, outTok: 5, cost: 0.01 },
+      { ts: lateTs, run: "run-1", call: "classifier", model: "openai:gpt-4o-mini", cost: 0.002 },
+    ]);
+    expect(readDay("2025-03-02")).toEqual([
+      { ts: earlyTs, run: "run-2", call: "agent_run", model: "anthropic:claude", inTok: 3 },
+      { ts: earlyTs, run: "run-2", call: "memory_update", model: "anthropic:claude", outTok: 7 },
+    ]);
+
+    await store.close();
+  });
+
   it("counts and marks chronicled messages", async () => {
     const store = createTempHistoryStore(10);
     await store.initialize();
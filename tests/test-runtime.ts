@@ -18,7 +18,9 @@ interface CreateTestRuntimeOptions {
 }
 
 export function createTestRuntime(options: CreateTestRuntimeOptions): MuaddibRuntime {
-  const muaddibHome = options.muaddibHome ?? join(tmpdir(), "muaddib-test-runtime");
+  // One default home per vitest worker so parallel forks never append to the same log files.
+  const muaddibHome = options.muaddibHome
+    ?? join(tmpdir(), `muaddib-test-runtime-${process.env.VITEST_POOL_ID ?? "0"}`);
 
   return {
     muaddibHome,
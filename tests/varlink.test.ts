@@ -72,6 +72,24 @@ describe("varlink helpers", () => {
     expect(await queue.shift()).toBe(42);
   });
 
+  it("AsyncQueue preserves FIFO order across long bursts", async () => {
+    const queue = new AsyncQueue<number>();
+    for (let i = 0; i < 3000; i++) {
+      queue.push(i);
+    }
+
+    const received: number[] = [];
+    for (let i = 0; i < 2000; i++) {
+      received.push(await queue.shift());
+    }
+    queue.push(3000);
+    while (received.length < 3001) {
+      received.push(await queue.shift());
+    }
+
+    expect(received).toEqual(Array.from({ length: 3001 }, (_, i) => i));
+  });
+
   it("parser.reset() clears buffered partial data", () => {
     const parser = new NullTerminatedJsonParser();
     parser.push('{"partial":tr');